@@ -3,6 +3,9 @@
 
 Not a complete wrapper. New routines added as required.
 
+`Table` stores tabular data by column in arrays, which is much more
+compact than a list of `pykern.pkcollections.Dict` rows.
+
 :copyright: Copyright (c) 2015 Bivio Software, Inc.  All Rights Reserved.
 :license: http://www.apache.org/licenses/LICENSE-2.0.html
 """
@@ -10,6 +13,7 @@ from __future__ import absolute_import, division, print_function
 from future.utils import bytes_to_native_str
 
 import array
+import collections
 
 #: Future-proof typecode for double
 DOUBLE_TYPECODE = bytes_to_native_str('d')
@@ -17,6 +21,175 @@ DOUBLE_TYPECODE = bytes_to_native_str('d')
 #: Future-proof typecode for float
 FLOAT_TYPECODE = bytes_to_native_str(b'f')
 
+
+class Table(object):
+    """Rows of values stored as columns
+
+    Columns are `array.array` objects or lists (for values which
+    are not numbers). Like `pykern.pkcollections.OrderedMapping`,
+    there are no public methods. Columns are accessed as attributes
+    or by name with ``[]``. Rows are accessed by integer index
+    and iteration, which return `TableRow` views onto the columns,
+    and `len` is the number of rows. Use `table_append` to add rows.
+
+    Example::
+
+        t = pkarray.Table([('x', pkarray.DOUBLE_TYPECODE), ('name', None)])
+        pkarray.table_append(t, (1.5, 'a'))
+        assert t.x[0] == t[0].x
+
+    Args:
+        columns (iterable): pairs of name and typecode, None (for list),
+            or an initial `array.array` or list, which is not copied
+    """
+    __slots__ = ('__columns',)
+
+    def __init__(self, columns):
+        c = collections.OrderedDict()
+        for k, v in columns:
+            if v is None:
+                v = []
+            elif not isinstance(v, (array.array, list)):
+                v = array.array(str(v))
+            c[k] = v
+        super(Table, self).__setattr__('_Table__columns', c)
+        _assert_lengths(self)
+
+    __hash__ = None
+
+    def __getattr__(self, name):
+        if name == '_Table__columns':
+            raise AttributeError(name)
+        try:
+            return self.__columns[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            n = len(self)
+            if key < 0:
+                key += n
+            if not 0 <= key < n:
+                raise IndexError(key)
+            return TableRow(self, key)
+        return self.__columns[key]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield TableRow(self, i)
+
+    def __len__(self):
+        for v in self.__columns.values():
+            return len(v)
+        return 0
+
+    def __repr__(self):
+        return '{}({} rows, {})'.format(
+            type(self).__name__,
+            len(self),
+            list(self.__columns),
+        )
+
+    def __setattr__(self, name, value):
+        self.__setitem__(name, value)
+
+    def __setitem__(self, key, value):
+        """Replace or add a column, which must have the same number of rows"""
+        for k, v in self.__columns.items():
+            if k != key:
+                assert len(v) == len(value), \
+                    '{}: column length {} does not match other columns {}'.format(
+                        key, len(value), len(v))
+                break
+        self.__columns[key] = value
+
+
+class TableRow(object):
+    """View of a single row of a `Table`
+
+    Values are read from and written to the table's columns. Iteration
+    is over the column names so `pykern.pkcollections.map_items` et al
+    work. There are no public methods.
+
+    Args:
+        table (Table): values
+        index (int): row in table
+    """
+    __slots__ = ('__table', '__index')
+
+    def __init__(self, table, index):
+        super(TableRow, self).__setattr__('_TableRow__table', table)
+        super(TableRow, self).__setattr__('_TableRow__index', index)
+
+    __hash__ = None
+
+    def __contains__(self, key):
+        return key in table_columns(self.__table)
+
+    def __eq__(self, other):
+        if not isinstance(other, TableRow):
+            return False
+        return table_columns(self.__table) == table_columns(other.__table) \
+            and all(self[k] == other[k] for k in self)
+
+    def __getattr__(self, name):
+        if name.startswith('_TableRow__'):
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __getitem__(self, key):
+        return _column(self.__table, key)[self.__index]
+
+    def __iter__(self):
+        return iter(table_columns(self.__table))
+
+    def __len__(self):
+        return len(table_columns(self.__table))
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        return '{}({})'.format(
+            type(self).__name__,
+            ', '.join('{!s}={!r}'.format(k, self[k]) for k in self),
+        )
+
+    def __setattr__(self, name, value):
+        try:
+            self[name] = value
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setitem__(self, key, value):
+        _column(self.__table, key)[self.__index] = value
+
+
+def map_column(op, column):
+    """Apply op to each element of column
+
+    The new column has the same type (and typecode) as column.
+    Arrays are built directly from the iterator without an
+    intermediate list.
+
+    Args:
+        op (callable): called with each value
+        column (array.array or list): values
+
+    Returns:
+        array.array or list: new column
+    """
+    if isinstance(column, array.array):
+        res = array.array(column.typecode)
+        res.extend(op(v) for v in column)
+        return res
+    return [op(v) for v in column]
+
+
 def new_double(*args, **kwargs):
     """Creates a new double ("d") array
 
@@ -39,3 +212,89 @@ def new_float(*args, **kwargs):
         array.array: New, initialized array
     """
     return array.array(FLOAT_TYPECODE, *args, **kwargs)
+
+
+def table_append(table, *rows):
+    """Append rows to table
+
+    If any row is invalid, none of the rows are appended.
+
+    Args:
+        table (Table): to modify
+        rows (object): sequences in column order or mappings by column name
+    """
+    n = table_columns(table)
+    c = [_column(table, k) for k in n]
+    l = len(table)
+    try:
+        for r in rows:
+            if hasattr(r, 'keys') or isinstance(r, TableRow):
+                r = [r[k] for k in n]
+            assert len(r) == len(c), \
+                '{}: row does not match columns {}'.format(r, n)
+            for x, v in zip(c, r):
+                x.append(v)
+    except BaseException:
+        for x in c:
+            del x[l:]
+        raise
+
+
+def table_columns(table):
+    """Names of the columns of table
+
+    Args:
+        table (Table): columns
+
+    Returns:
+        list: column names in order
+    """
+    return list(table._Table__columns)
+
+
+def to_numpy(column):
+    """Convert column to a NumPy array
+
+    `array.array` columns are not copied: the result shares the column's
+    buffer, so the column must not be resized while the result exists.
+    Lists are copied.
+
+    Args:
+        column (array.array or list): values
+
+    Returns:
+        numpy.ndarray: values
+    """
+    import numpy
+
+    if isinstance(column, array.array):
+        return numpy.frombuffer(column, dtype=column.typecode)
+    return numpy.array(column)
+
+
+def _assert_lengths(table):
+    """All columns must be the same length
+
+    Args:
+        table (Table): to check
+    """
+    n = None
+    for k in table_columns(table):
+        l = len(_column(table, k))
+        if n is None:
+            n = l
+        assert n == l, \
+            '{}: column length {} does not match other columns {}'.format(k, l, n)
+
+
+def _column(table, name):
+    """Column by name only (not row index)
+
+    Args:
+        table (Table): columns
+        name (str): column
+
+    Returns:
+        array.array or list: column
+    """
+    return table._Table__columns[name]
@@ -93,6 +93,7 @@ def read_all():
     Returns:
         dict: merged data
     """
+    from pykern import pkcollections
     from pykern import pkio
     from pykern import pkjson
 
@@ -102,7 +103,6 @@ def read_all():
     c = pkjson.load_any(pkio.py_path(CONTAINER_FILE))
     assert u.version == c.version, \
         '(user.version) {} != {} (container.version)'.format(u.version, c.version)
-    # There are "guaranteed" to be no collisions, but if there are
-    # we override user.
-    c.update(u)
-    return c
+    # Nested mappings are merged. Other user values, including lists,
+    # replace container values; a list and a non-list is an error.
+    return pkcollections.deep_merge(c, u, prepend_lists=False)
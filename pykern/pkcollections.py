@@ -11,8 +11,28 @@ a OrderedMapping don't collide.
 """
 from __future__ import absolute_import, division, print_function
 # Avoid pykern imports so avoid dependency issues for pkconfig
+import collections
+import copy
 import json
 
+#: Attribute names of `Dict` and its subclasses (see `_dict_reserved_init`)
+_dict_reserved = {}
+
+#: Maximum number of compiled paths cached by `path`
+_PATHS_MAX = 10000
+
+#: Types which `DottedPath` indexes with integers
+_SEQUENCES = (list, tuple)
+
+#: Bound once to avoid attribute lookups in `Dict.__getattribute__`
+_dict_getitem = dict.__getitem__
+
+#: Bound once to avoid attribute lookups in `Dict.__getattribute__`
+_object_getattribute = dict.__getattribute__
+
+#: Cache of `DottedPath` instances (see `path`)
+_paths = {}
+
 class Dict(dict):
     """A subclass of dict that allows items to be read/written as attributes.
 
@@ -47,16 +67,28 @@ class Dict(dict):
         raise DictNameError('{}: you cannot delete attributes', name)
 
     def __getattr__(self, name):
-        try:
-            return self.__getattribute__(name)
-        except AttributeError:
+        # Only called when name is neither a key nor an attribute
+        raise AttributeError(
+            '{}: not a key or attribute of {}'.format(name, type(self).__name__))
+
+    def __getattribute__(self, name):
+        # Keys are looked up directly so that reading a key as an
+        # attribute does not raise and catch an AttributeError first
+        r = _dict_reserved.get(type(self))
+        if r is None:
+            r = _dict_reserved_init(type(self))
+        if name not in r:
             try:
-                return self[name]
+                return _dict_getitem(self, name)
             except KeyError:
-                return self.__getattribute__(name)
+                pass
+        return _object_getattribute(self, name)
 
     def __setattr__(self, name, value):
-        if name in dir(self):
+        r = _dict_reserved.get(type(self))
+        if r is None:
+            r = _dict_reserved_init(type(self))
+        if name in r or name in _object_getattribute(self, '__dict__'):
             raise DictNameError(
                 '{}: invalid key for Dict matches existing attribute'.format(name))
         super(Dict, self).__setitem__(name, value)
@@ -73,7 +105,7 @@ class Dict(dict):
             object: value of element
         """
         d = self
-        for k in dotted_key.split('.'):
+        for k in (_paths.get(dotted_key) or path(dotted_key)).parts:
             d = d[k]
         return d
 
@@ -83,6 +115,262 @@ class DictNameError(NameError):
     pass
 
 
+class DottedPath(object):
+    """Compiled dotted key, e.g. ``models.beam.energy``
+
+    Use `path` to create, which caches instances. Parts which are
+    digits index lists and tuples, e.g. ``beams.0.energy``.
+
+    Args:
+        dotted_key (str): keys separated by dots
+
+    Attributes:
+        dotted_key (str): as passed
+        parts (tuple): keys split on dots
+    """
+    __slots__ = ('dotted_key', 'parts', '_parts')
+
+    def __init__(self, dotted_key):
+        self.dotted_key = dotted_key
+        self.parts = tuple(dotted_key.split('.'))
+        assert all(self.parts), \
+            '{}: empty key in path'.format(dotted_key)
+        self._parts = tuple(
+            (k, int(k) if k.isdigit() else None) for k in self.parts
+        )
+
+    def __repr__(self):
+        return '{}({!r})'.format(type(self).__name__, self.dotted_key)
+
+    def delete(self, obj):
+        """Remove the element at path
+
+        Throws KeyError (or IndexError) if the element doesn't exist.
+
+        Args:
+            obj (object): mapping containing path
+        """
+        p = self._parts
+        c = self._container(obj)
+        k, i = p[-1]
+        del c[k if i is None or not isinstance(c, _SEQUENCES) else i]
+
+    def exists(self, obj):
+        """Is there an element at path?
+
+        Args:
+            obj (object): mapping to search
+
+        Returns:
+            bool: True if get would succeed
+        """
+        try:
+            self.get(obj)
+            return True
+        except (KeyError, IndexError, TypeError):
+            return False
+
+    def get(self, obj, *default):
+        """Return the element at path
+
+        Throws KeyError (or IndexError) if the element doesn't exist
+        and no `default` is supplied.
+
+        Args:
+            obj (object): mapping to search
+            default (object): returned if path doesn't exist [optional]
+
+        Returns:
+            object: value of element
+        """
+        try:
+            for k, i in self._parts:
+                obj = obj[k if i is None or not isinstance(obj, _SEQUENCES) else i]
+            return obj
+        except (KeyError, IndexError):
+            if default:
+                return default[0]
+            raise
+
+    def set(self, obj, value):
+        """Assign value to the element at path
+
+        Missing intermediate mappings are created as `Dict`.
+
+        Args:
+            obj (object): mapping containing path
+            value (object): new value
+        """
+        c = self._container(obj, create=True)
+        k, i = self._parts[-1]
+        c[k if i is None or not isinstance(c, _SEQUENCES) else i] = value
+
+    def _container(self, obj, create=False):
+        for k, i in self._parts[:-1]:
+            if i is not None and isinstance(obj, _SEQUENCES):
+                obj = obj[i]
+            elif create and k not in obj:
+                obj[k] = Dict()
+                obj = obj[k]
+            else:
+                obj = obj[k]
+        return obj
+
+
+class FrozenDict(Dict):
+    """Immutable, hashable `Dict` which can be shared without copying
+
+    Values are frozen deeply with `freeze` on construction so nested
+    dicts become `FrozenDict` and lists become tuples. The hash is
+    computed on first use and cached.
+
+    Copies (`copy.copy`, `copy.deepcopy`, and ``copy()``) return
+    the same object. Use `thaw` to get a mutable `Dict`.
+    """
+    __slots__ = ('_hash',)
+
+    def __init__(self, *args, **kwargs):
+        try:
+            object.__getattribute__(self, '_hash')
+        except AttributeError:
+            pass
+        else:
+            # __init__ called again on an existing FrozenDict
+            self._immutable()
+        super(FrozenDict, self).__init__(*args, **kwargs)
+        for k, v in dict.items(self):
+            f = freeze(v)
+            if f is not v:
+                dict.__setitem__(self, k, f)
+        object.__setattr__(self, '_hash', None)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __delitem__(self, key):
+        self._immutable()
+
+    def __hash__(self):
+        if self._hash is None:
+            object.__setattr__(self, '_hash', hash(frozenset(dict.items(self))))
+        return self._hash
+
+    def __ior__(self, other):
+        self._immutable()
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+    def __setattr__(self, name, value):
+        self._immutable()
+
+    def __setitem__(self, key, value):
+        self._immutable()
+
+    def clear(self):
+        self._immutable()
+
+    def copy(self):
+        return self
+
+    def pop(self, *args, **kwargs):
+        self._immutable()
+
+    def popitem(self):
+        self._immutable()
+
+    def setdefault(self, *args, **kwargs):
+        self._immutable()
+
+    def update(self, *args, **kwargs):
+        self._immutable()
+
+    def _immutable(self):
+        raise TypeError('{} is immutable'.format(type(self).__name__))
+
+
+class LazyItems(object):
+    """Chainable transforms over the (key, value) pairs of a mapping
+
+    Nothing is evaluated until the view is iterated, and each
+    iteration reads the mapping again, so no intermediate lists
+    are built. Transforms return a new view and do not modify
+    this one. Create with `lazy_items`.
+
+    Example::
+
+        v = pkcollections.lazy_items(m).filter(lambda k, v: v > 0).map_values(abs)
+        d = dict(v)
+
+    Args:
+        value (object): Any object that implements iteration on keys and getitem
+        ops (tuple): transforms to apply (internal)
+    """
+    def __init__(self, value, ops=()):
+        self._value = value
+        self._ops = ops
+
+    def __iter__(self):
+        res = iter_items(self._value)
+        for is_filter, op in self._ops:
+            res = _lazy_filter(res, op) if is_filter else _lazy_map(res, op)
+        return res
+
+    def filter(self, op):
+        """Only include pairs for which op is true
+
+        Args:
+            op (function): called with key, value
+
+        Returns:
+            LazyItems: new view
+        """
+        return LazyItems(self._value, self._ops + ((True, op),))
+
+    def iter_keys(self):
+        """Iterate keys after transforms
+
+        Not named ``keys``, because `dict` would treat the view as a mapping.
+
+        Returns:
+            iterator: keys
+        """
+        return (k for k, v in self)
+
+    def iter_values(self):
+        """Iterate values after transforms
+
+        Returns:
+            iterator: values
+        """
+        return (v for k, v in self)
+
+    def map(self, op):
+        """Replace pairs with result of op
+
+        Args:
+            op (function): called with key, value and returns (key, value)
+
+        Returns:
+            LazyItems: new view
+        """
+        return LazyItems(self._value, self._ops + ((False, op),))
+
+    def map_values(self, op):
+        """Replace values with result of op
+
+        Args:
+            op (function): called with value
+
+        Returns:
+            LazyItems: new view
+        """
+        return self.map(lambda k, v: (k, op(v)))
+
+
 class OrderedMapping(object):
     """Ordered mapping can be initialized by kwargs or single argument.
 
@@ -92,11 +380,18 @@ class OrderedMapping(object):
 
     All operations are munged names to avoid collisions with the clients
     of OrderedMapping so there are no "methods" on self except operator overloads.
+
+    Values are stored in a single `collections.OrderedDict` so inserts,
+    lookups, and deletes are constant time.
     """
+    __slots__ = ('__values',)
+
     def __init__(self, *args, **kwargs):
-        self.__order = []
-        # Remove __order's mangled name from __order
-        self.__order.pop(0)
+        super(OrderedMapping, self).__setattr__(
+            '_OrderedMapping__values',
+            collections.OrderedDict(),
+        )
+        v = self.__values
         if args:
             assert not kwargs, \
                 'May not pass kwargs if passing args'
@@ -109,15 +404,15 @@ class OrderedMapping(object):
             if args:
                 if isinstance(args[0], (tuple, list)):
                     # For json.object_pairs_hook, accept list of 2-tuples
-                    for k, v in args:
-                        setattr(self, k, v)
+                    for k, x in args:
+                        v[k] = x
                     return
                 if len(args) % 2 != 0:
                     raise TypeError(
                         'If mapping type given, must be even number of values')
                 i = iter(args)
-                for k, v in zip(i, i):
-                    setattr(self, k, v)
+                for k, x in zip(i, i):
+                    v[k] = x
                 return
             # If args[0] is not mapping type, then this method
             # will not fail as it should. The problem is that you
@@ -126,63 +421,237 @@ class OrderedMapping(object):
             # for iterators but the values, which is why ['a'] will
             # fail as an initializer.
         for k in kwargs:
-            setattr(self, k, kwargs[k])
+            v[k] = kwargs[k]
 
     __hash__ = None
 
     def __contains__(self, key):
-        return key in self.__order
+        return key in self.__values
 
     def __delattr__(self, name):
-        super(OrderedMapping, self).__delattr__(name)
-        self.__order.remove(name)
+        try:
+            del self.__values[name]
+        except KeyError:
+            raise AttributeError(name)
 
     def __delitem__(self, key):
-        try:
-            delattr(self, key)
-        except AttributeError:
-            raise KeyError(key)
+        del self.__values[key]
 
     def __eq__(self, other):
         """Type of object, and order of keys and values must be the same"""
         if not type(self) == type(other):
             return False
-        # Types must be the same. "__order" is included in vars()
-        # so verifies order, too.
-        return vars(self) == vars(other)
+        # OrderedDict equality verifies order, too.
+        return self.__values == other.__values
 
-    def __getitem__(self, key):
+    def __getattr__(self, name):
+        if name == '_OrderedMapping__values':
+            # Not initialized, e.g. during unpickling
+            raise AttributeError(name)
         try:
-            return getattr(self, key)
-        except AttributeError:
-            raise KeyError(key)
+            return self.__values[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __getitem__(self, key):
+        return self.__values[key]
 
     def __iter__(self):
-        return iter(self.__order)
+        return iter(self.__values)
 
     def __len__(self):
-        return len(self.__order)
+        return len(self.__values)
 
     def __ne__(self, other):
         return not self.__eq__(other)
 
+    def __reduce__(self):
+        return (type(self), (list(self.__values.items()),))
+
     def __repr__(self):
         res = type(self).__name__ + '('
         if not len(self):
             return res + ')'
-        for name in self:
-            res += '{!s}={!r}, '.format(name, getattr(self, name))
+        for name, value in self.__values.items():
+            res += '{!s}={!r}, '.format(name, value)
         return res[:-2] + ')'
 
     def __setattr__(self, name, value):
-        super(OrderedMapping, self).__setattr__(name, value)
-        if name not in self.__order:
-            self.__order.append(name)
+        self.__values[name] = value
+
+    def __setitem__(self, key, value):
+        self.__values[key] = value
+
+
+class Record(object):
+    """Base class of types created by `record_type`
+
+    Args:
+        args (tuple): values in field order
+        kwargs (dict): values by field name
+    """
+    __slots__ = ()
+
+    #: names of fields in order (set by `record_type`)
+    _fields = ()
+
+    def __init__(self, *args, **kwargs):
+        f = self._fields
+        if len(args) > len(f):
+            raise TypeError(
+                '{}: too many values for {}'.format(args, type(self).__name__))
+        for k, v in zip(f, args):
+            setattr(self, k, v)
+        for k in f[len(args):]:
+            setattr(self, k, kwargs.pop(k, None))
+        if kwargs:
+            raise TypeError(
+                '{}: unknown fields for {}'.format(sorted(kwargs), type(self).__name__))
+
+    __hash__ = None
+
+    def __contains__(self, key):
+        return key in self._fields
+
+    def __eq__(self, other):
+        if not type(self) == type(other):
+            return False
+        return all(getattr(self, k) == getattr(other, k) for k in self._fields)
+
+    def __getitem__(self, key):
+        if key not in self._fields:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __repr__(self):
+        return '{}({})'.format(
+            type(self).__name__,
+            ', '.join('{!s}={!r}'.format(k, getattr(self, k)) for k in self._fields),
+        )
 
     def __setitem__(self, key, value):
+        if key not in self._fields:
+            raise KeyError(key)
         setattr(self, key, value)
 
 
+def deep_merge(base, *updates, **kwargs):
+    """Merge updates into base recursively without modifying either
+
+    Mappings (dict and `OrderedMapping`) are merged key by key. If both
+    values are lists, the new list is prepended to the base list (like
+    `pykern.pkconfig.flatten_values`), unless ``prepend_lists`` is False,
+    in which case the new list replaces the old. None replaces any value.
+    Otherwise, a list and a non-list collide, and AssertionError is raised.
+    All other values replace the base value.
+
+    Only the containers along modified paths are copied. Unchanged
+    subtrees of base and all subtrees of updates are shared with
+    the result, so treat them as read-only or `freeze` them first.
+    If nothing changes, base is returned. A `FrozenDict` base produces
+    a `FrozenDict` result.
+
+    Args:
+        base (object): mapping to merge into
+        updates (object): mappings applied in order
+        prepend_lists (bool): prepend new lists to base lists [True]
+
+    Returns:
+        object: merged value
+    """
+    p = kwargs.pop('prepend_lists', True)
+    assert not kwargs, \
+        '{}: unexpected keyword arguments'.format(list(kwargs))
+    res = base
+    for u in updates:
+        res = _deep_merge(res, u, p, ())
+    return res
+
+
+def freeze(value):
+    """Deep copy value into immutable, hashable containers
+
+    dicts (and `OrderedMapping`) become `FrozenDict`, lists become tuples,
+    and sets become frozensets. Values which are already frozen are
+    shared, not copied.
+
+    Args:
+        value (object): to freeze
+
+    Returns:
+        object: frozen value or value if not a container
+    """
+    if isinstance(value, FrozenDict):
+        return value
+    if isinstance(value, dict):
+        return FrozenDict(value)
+    if isinstance(value, OrderedMapping):
+        return FrozenDict(map_items(value))
+    if isinstance(value, (list, tuple)):
+        res = tuple(freeze(v) for v in value)
+        if type(value) == tuple and all(a is b for a, b in zip(res, value)):
+            return value
+        return res
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+
+def iter_items(value, op=None):
+    """Like `map_items`, but returns an iterator
+
+    Args:
+        value (object): Any object that implements iteration on keys
+        op (function): called with each key, value, in order
+            (default: return (key, value))
+
+    Returns:
+        iterator: results of op
+    """
+    if not op:
+        return ((k, value[k]) for k in value)
+    return (op(k, value[k]) for k in value)
+
+
+def iter_keys(value, op=None):
+    """Like `map_keys`, but returns an iterator
+
+    Args:
+        value (object): Any object that implements iteration on keys
+        op (function): called with each key, in order (default: return key)
+
+    Returns:
+        iterator: results of op
+    """
+    if not op:
+        return iter(value)
+    return (op(k) for k in value)
+
+
+def iter_values(value, op=None):
+    """Like `map_values`, but returns an iterator
+
+    Args:
+        value (object): Any object that implements iteration on values
+        op (function): called with each key, in order (default: return value)
+
+    Returns:
+        iterator: results of op
+    """
+    if not op:
+        return (value[k] for k in value)
+    return (op(value[k]) for k in value)
+
+
 def json_load_any(obj, *args, **kwargs):
     """Read json file or str with ``object_pairs_hook=Dict``
 
@@ -194,11 +663,25 @@ def json_load_any(obj, *args, **kwargs):
     Returns:
         object: parsed JSON
     """
-    kwargs.setdefault('object_pairs_hook', object_pairs_hook)
+    # Dict can't raise DictNameError on construction, because dict.__init__
+    # doesn't call __setattr__, so Dict is the hook (no Python call per object)
+    kwargs.setdefault('object_pairs_hook', Dict)
     o = obj.read() if hasattr(obj, 'read') else obj
     return json.loads(o, *args, **kwargs)
 
 
+def lazy_items(value):
+    """Create a lazy, chainable view of value's items
+
+    Args:
+        value (object): Any object that implements iteration on keys
+
+    Returns:
+        LazyItems: view
+    """
+    return LazyItems(value)
+
+
 def map_items(value, op=None):
     """Iterate over mapping, calling op with key, value
 
@@ -250,7 +733,7 @@ def map_to_dict(value):
     Returns:
         dict: Converted mapping
     """
-    return dict(map_items(value))
+    return dict(iter_items(value))
 
 
 def map_values(value, op=None):
@@ -268,16 +751,142 @@ def map_values(value, op=None):
     return [op(value[k]) for k in value]
 
 
+def nested_update(obj, updates):
+    """Assign many dotted paths in a single traversal
+
+    Updates are applied in order. Consecutive paths which share
+    a prefix reuse the containers found for the previous path so
+    the prefix is only traversed once. Missing intermediate mappings
+    are created as `Dict`.
+
+    Args:
+        obj (object): mapping to modify
+        updates (object): mapping or iterable of pairs of dotted keys (or `DottedPath`) to values
+    """
+    # stack[i] is the container reached by prev[:i]
+    stack = [obj]
+    prev = ()
+    if isinstance(updates, (dict, OrderedMapping)):
+        updates = iter_items(updates)
+    for k, v in updates:
+        p = path(k)._parts
+        if len(p) == len(prev) and p[:-1] == prev[:-1]:
+            # Common case: sibling of previous path
+            n = len(p) - 1
+        else:
+            n = 0
+            m = min(len(prev), len(p)) - 1
+            while n < m and prev[n] == p[n]:
+                n += 1
+            del stack[n + 1:]
+        c = stack[-1]
+        for k, i in p[n:-1]:
+            if i is not None and isinstance(c, _SEQUENCES):
+                c = c[i]
+            else:
+                if k not in c:
+                    c[k] = Dict()
+                c = c[k]
+            stack.append(c)
+        k, i = p[-1]
+        c[k if i is None or not isinstance(c, _SEQUENCES) else i] = v
+        prev = p
+
+
 def object_pairs_hook(*args, **kwargs):
-    """Tries to use `Dict` if else uses `dict`
+    """Creates a `Dict`
+
+    Keys which collide with attributes are allowed. They are
+    only accessible with ``[]``. `json_load_any` uses `Dict` directly.
 
     Returns:
-        object: `Dict` or `dict`
+        object: `Dict`
     """
+    return Dict(*args, **kwargs)
+
+
+def path(dotted_key):
+    """Compile a dotted key into a `DottedPath`
+
+    Instances are cached so repeated calls with the same key
+    do not split the key again.
+
+    Args:
+        dotted_key (str or DottedPath): keys separated by dots
+
+    Returns:
+        DottedPath: compiled path
+    """
+    if isinstance(dotted_key, DottedPath):
+        return dotted_key
     try:
-        return Dict(*args, **kwargs)
-    except DictNameError:
-        return dict(*args, **kwargs)
+        return _paths[dotted_key]
+    except KeyError:
+        pass
+    if len(_paths) >= _PATHS_MAX:
+        _paths.clear()
+    res = _paths[dotted_key] = DottedPath(dotted_key)
+    return res
+
+
+def record_type(name, fields):
+    """Create a compact, mutable record class with fixed keys
+
+    Instances are slotted so they use a fraction of the memory of
+    a `Dict`. Like `OrderedMapping`, there are no public methods.
+    Values are accessed as attributes or items, and iteration is
+    over the fields in order so `map_items` et al work. Fields not
+    passed to the constructor are None.
+
+    Example::
+
+        Particle = pkcollections.record_type('Particle', ['x', 'y', 'px'])
+        p = Particle(1.0, 2.0, px=0.5)
+        assert p.y == p['y']
+
+    `pykern.pkjson` serializes records as objects. Construct a record
+    from a parsed object with ``Particle(**value)``.
+
+    Args:
+        name (str): class name
+        fields (iterable): str names of fields, which must not begin with underscore
+
+    Returns:
+        type: subclass of `Record`
+    """
+    fields = tuple(str(f) for f in fields)
+    for f in fields:
+        assert not f.startswith('_'), \
+            '{}: field may not begin with underscore'.format(f)
+    assert len(set(fields)) == len(fields), \
+        '{}: duplicate fields'.format(fields)
+    return type(str(name), (Record,), {'__slots__': fields, '_fields': fields})
+
+
+def thaw(value, deep=False):
+    """Copy a frozen value into mutable containers
+
+    By default, only the top level is copied, and the nested frozen values
+    are shared. To modify a nested value, thaw it and assign it to
+    its (thawed) parent so that only the modified path is copied.
+
+    Args:
+        value (object): `FrozenDict`, tuple, or frozenset
+        deep (bool): thaw nested values, too [False]
+
+    Returns:
+        object: `Dict`, list, set, or value if not frozen
+    """
+    if isinstance(value, FrozenDict):
+        res = Dict()
+        for k, v in dict.items(value):
+            dict.__setitem__(res, k, thaw(v, deep) if deep else v)
+        return res
+    if isinstance(value, tuple):
+        return [thaw(v, deep) for v in value] if deep else list(value)
+    if isinstance(value, frozenset):
+        return set(value)
+    return value
 
 
 def unchecked_del(obj, key):
@@ -291,3 +900,98 @@ def unchecked_del(obj, key):
         del obj[key]
     except KeyError:
         pass
+
+
+def _deep_merge(base, new, prepend_lists, key_parts):
+    """Recursive implementation of `deep_merge`
+
+    Args:
+        base (object): existing value
+        new (object): value to merge
+        prepend_lists (bool): see `deep_merge`
+        key_parts (tuple): path to values for errors
+
+    Returns:
+        object: base if unchanged or merged value
+    """
+    if new is None or base is None:
+        return new
+    t = (dict, OrderedMapping)
+    if isinstance(new, t) and isinstance(base, t):
+        res = None
+        for k in new:
+            n = new[k]
+            if k in base:
+                b = base[k]
+                v = _deep_merge(b, n, prepend_lists, key_parts + (k,))
+                if v is b:
+                    continue
+            else:
+                v = n
+            if res is None:
+                res = _mapping_copy(base)
+            res[k] = v
+        if res is None:
+            return base
+        if isinstance(base, FrozenDict):
+            return FrozenDict(res)
+        return res
+    if isinstance(new, _SEQUENCES) or isinstance(base, _SEQUENCES):
+        assert isinstance(new, _SEQUENCES) and isinstance(base, _SEQUENCES), \
+            '{}: type mismatch between new value ({}) and base ({})'.format(
+                '.'.join(str(k) for k in key_parts), new, base)
+        if not prepend_lists or not base:
+            return new
+        if not new:
+            return base
+        if isinstance(base, tuple):
+            return tuple(new) + base
+        return list(new) + base
+    return new
+
+
+def _dict_reserved_init(cls):
+    """Cache attribute names of cls, which can't be set as keys
+
+    `dir` is expensive so the names are computed once per class.
+
+    Args:
+        cls (type): `Dict` or subclass
+
+    Returns:
+        frozenset: attribute names
+    """
+    res = frozenset(dir(cls))
+    _dict_reserved[cls] = res
+    return res
+
+
+def _lazy_filter(items, op):
+    """Generator for `LazyItems.filter` (binds op)"""
+    for k, v in items:
+        if op(k, v):
+            yield k, v
+
+
+def _lazy_map(items, op):
+    """Generator for `LazyItems.map` (binds op)"""
+    for k, v in items:
+        yield op(k, v)
+
+
+def _mapping_copy(value):
+    """Shallow copy of a mapping, which is mutable
+
+    Args:
+        value (object): dict or `OrderedMapping`
+
+    Returns:
+        object: `Dict` for `FrozenDict`, else same type as value
+    """
+    if isinstance(value, FrozenDict):
+        res = Dict()
+        dict.update(res, value)
+        return res
+    if isinstance(value, OrderedMapping):
+        return type(value)(map_items(value))
+    return copy.copy(value)
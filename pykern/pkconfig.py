@@ -153,6 +153,11 @@ from pykern import pkcollections
 from pykern import pkinspect
 from pykern import pkrunpy
 
+try:
+    from collections.abc import Mapping as _Mapping
+except ImportError:
+    from collections import Mapping as _Mapping
+
 #: Python version independent value of string instance check
 STRING_TYPES = None
 # pykern uses pksetup in setup.py so requirements.txt is not yet evaluated so can't use six
@@ -205,6 +210,9 @@ _PARSE_NONE_ATTR = 'pykern_pkconfig_parse_none'
 #: Value to add to os.environ (see `reset_state_for_testing`)
 _add_to_environ = None
 
+#: Maximum threads used by `all_modules_in_load_path` to preload modules
+_PRELOAD_THREADS = 8
+
 #: Where to load for packages (same as cfg.load_path)
 _load_path = LOAD_PATH_DEFAULT[:]
 
@@ -215,6 +223,50 @@ _raw_values = None
 _parsed_values = None
 
 
+class ModuleMap(_Mapping):
+    """Read-only map of base names to modules, imported on first access
+
+    Returned by `all_modules_in_load_path`. Modules can be referenced
+    as items or attributes, just like `pkcollections.Dict`.
+
+    Args:
+        names (dict): base name to fully qualified module name
+    """
+    def __init__(self, names):
+        self._names = names
+        self._modules = {}
+
+    def __contains__(self, key):
+        # Mapping's implementation would import the module
+        return key in self._names
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __getitem__(self, key):
+        try:
+            return self._modules[key]
+        except KeyError:
+            pass
+        res = importlib.import_module(self._names[key])
+        self._modules[key] = res
+        return res
+
+    def __iter__(self):
+        return iter(self._names)
+
+    def __len__(self):
+        return len(self._names)
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, sorted(self._names))
+
+
 class Required(tuple, object):
     """Container for a required parameter declaration.
 
@@ -249,25 +301,30 @@ def parse_none(func):
     return func
 
 
-def all_modules_in_load_path(path_module=None):
-    """Loads all modules in path_module
+def all_modules_in_load_path(path_module=None, preload=False):
+    """Maps all modules in path_module, importing them on first access
 
     Finds all modules in `cfg.load_path` matching the main_module sans root.
     If path_module is ``sirepo.pkcli``, then the loaded modules will look
     like ``<root>.pkcli.<base>``. Only goes one depth.
 
+    Only the packages are imported to find the module names. A module
+    is imported when its base name is first accessed in the map, unless
+    `preload` is set.
+
     Args:
         path_module (module): full path module [caller module]
+        preload (bool): import all modules now in parallel threads [False]
 
     Returns:
-        pkcollection.Dict: map of base names to module objects
+        ModuleMap: map of base names to module objects
     """
     import pkgutil
 
     _coalesce_values()
     if not path_module:
         path_module = pkinspect.caller_module()
-    res = pkcollections.Dict()
+    names = {}
     pn = pkinspect.submodule_name(path_module)
     for p in reversed(cfg.load_path):
         try:
@@ -276,8 +333,11 @@ def all_modules_in_load_path(path_module=None):
             # submodule need not exist in root
             continue
         for l, n, is_pkg in pkgutil.iter_modules(path=pm.__path__):
-            if not is_pkg and n not in res:
-                res[n] = importlib.import_module(pkinspect.module_name_join((pm.__name__, n)))
+            if not is_pkg and n not in names:
+                names[n] = pkinspect.module_name_join((pm.__name__, n))
+    res = ModuleMap(names)
+    if preload:
+        _preload_modules(res)
     return res
 
 
@@ -640,6 +700,27 @@ def _iter_decls(decls, res):
         _parsed_values[k] = r[kp]
 
 
+def _preload_modules(modules):
+    """Import all modules in parallel threads
+
+    Imports are mostly I/O so threads overlap reading and compiling
+    the files.
+
+    Args:
+        modules (ModuleMap): what to import
+    """
+    from multiprocessing.pool import ThreadPool
+
+    if not modules:
+        return
+    p = ThreadPool(min(len(modules), _PRELOAD_THREADS))
+    try:
+        p.map(modules.__getitem__, list(modules))
+    finally:
+        p.close()
+        p.join()
+
+
 def _resolver(decl):
     """How to resolve values for declaration
 
@@ -22,6 +22,77 @@ import six
 #: used during unit testing see ``pykern.pkunit.save_chdir``
 pkunit_prefix = None
 
+#: Buffer size of files opened by `atomic_open`
+_WRITE_BUFFER_SIZE = 1 << 20
+
+#: Cached value of `locale.getpreferredencoding` (see `_encoding`)
+_preferred_encoding = None
+
+#: Default bytes per chunk yielded by `read_chunks`
+_READ_CHUNK_SIZE = 1 << 20
+
+#: Bytes read at once by `hash_tree`
+_HASH_CHUNK_SIZE = 1 << 20
+
+#: Default threads used by `walk_tree_parallel` and `hash_tree`
+_TREE_THREADS = 8
+
+
+@contextlib.contextmanager
+def atomic_open(filename, mode='wb', encoding=None, fsync=False):
+    """Open a temporary file which replaces filename on success
+
+    The temporary file is created in the same directory as
+    `filename` and renamed to `filename` when the block exits
+    without an exception, so readers never see a partial file.
+    On an exception, the temporary file is removed and `filename`
+    is unchanged. The file has `filename`'s permissions if it
+    exists, else the default permissions from the umask. If
+    `filename` is a symlink, its target is replaced.
+
+    Writes are buffered in `_WRITE_BUFFER_SIZE` chunks. With
+    `fsync`, the file and its directory are synced to disk before
+    and after the rename, so the new contents survive a crash.
+
+    Args:
+        filename (str or py.path): file to replace
+        mode (str): ``wb`` or ``w`` ['wb']
+        encoding (str): for text mode [preferred encoding]
+        fsync (bool): sync to disk [False]
+
+    Yields:
+        file: open for writing
+    """
+    import tempfile
+
+    assert mode in ('w', 'wb'), \
+        '{}: mode must be w or wb'.format(mode)
+    fn = os.path.realpath(str(py_path(filename)))
+    d, b = os.path.split(fn)
+    fd, t = tempfile.mkstemp(dir=d, prefix='.' + b + '-')
+    try:
+        with io.open(
+            fd,
+            mode,
+            buffering=_WRITE_BUFFER_SIZE,
+            encoding=None if 'b' in mode else encoding or _encoding(),
+        ) as f:
+            yield f
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.chmod(t, _file_mode(fn))
+        os.rename(t, fn)
+    except BaseException:
+        os.remove(t)
+        raise
+    if fsync:
+        fd = os.open(d, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
 
 def exception_is_not_found(exc):
     """True if exception is IOError and ENOENT
@@ -65,6 +136,128 @@ def has_file_extension(filename, to_check):
     return e in to_check
 
 
+def hash_tree(dirname, file_re=None, dir_re=None, cache_file=None, algorithm='sha256', threads=None):
+    """Hash the contents of all files in a tree
+
+    The tree is walked with `walk_tree_parallel`, and files are hashed
+    in the same thread pool, reading `_HASH_CHUNK_SIZE` bytes at a
+    time. hashlib and file reads release the GIL, so threads work in
+    parallel.
+
+    With `cache_file`, the hashes and each file's mtime, size, and
+    inode are saved as JSON. Files whose stat values are unchanged
+    are not read on subsequent calls. `cache_file` is not included
+    in the manifest if it is in the tree.
+
+    Args:
+        dirname (str or py.path): directory to walk
+        file_re (re or str): see `iter_tree`
+        dir_re (re or str): see `iter_tree`
+        cache_file (str or py.path): where to save hashes [None]
+        algorithm (str): passed to `hashlib.new` ['sha256']
+        threads (int): size of thread pool [8]
+
+    Returns:
+        collections.OrderedDict: relative path to hex digest, sorted by path
+    """
+    from multiprocessing.pool import ThreadPool
+    import collections
+    import hashlib
+    import json
+
+    cf = cache_file and str(py_path(cache_file).realpath())
+    old = {}
+    if cf:
+        try:
+            with open(cf) as f:
+                c = json.load(f)
+            if c['algorithm'] == algorithm:
+                old = c['files']
+        except (IOError, OSError, ValueError, KeyError):
+            # missing or corrupt cache file: hash everything
+            pass
+
+    def _hash(item):
+        r, e = item
+        s = e.stat()
+        k = [getattr(s, 'st_mtime_ns', s.st_mtime), s.st_size, s.st_ino]
+        o = old.get(r)
+        if o and o[:3] == k:
+            return r, k, o[3]
+        h = hashlib.new(algorithm)
+        with open(e.path, 'rb') as f:
+            while True:
+                b = f.read(_HASH_CHUNK_SIZE)
+                if not b:
+                    break
+                h.update(b)
+        return r, k, h.hexdigest()
+
+    p = ThreadPool(threads or _TREE_THREADS)
+    try:
+        res = p.map(
+            _hash,
+            [x for x in _walk_parallel(p, dirname, file_re, dir_re) if x[1].path != cf],
+        )
+    finally:
+        p.close()
+        p.join()
+    res.sort(key=lambda x: x[0])
+    if cf:
+        with atomic_open(cf) as f:
+            f.write(json.dumps(
+                dict(
+                    algorithm=algorithm,
+                    files=dict((r, k + [h]) for r, k, h in res),
+                ),
+            ).encode('utf-8'))
+    return collections.OrderedDict((r, h) for r, k, h in res)
+
+
+def iter_tree(dirname, file_re=None, dir_re=None, entries=False):
+    """Yield files (only) top down, sorted by name within each directory
+
+    Unlike `walk_tree`, paths are yielded as they are found, and
+    no `py.path.local` objects are created, so memory is bounded by
+    the size of the largest directory. Directories are read with
+    `os.scandir` (the ``scandir`` package in Python 2), so the file
+    type comes from the directory entry, and `os.DirEntry.stat` caches
+    its result.
+
+    Entries in each directory are sorted by name, and subdirectories are
+    walked when they are reached, which is not always the same order as
+    `walk_tree` (e.g. ``a/x`` is before ``a-b``). Like `walk_tree`,
+    symbolic links to directories are not followed or yielded, and
+    unreadable directories are skipped.
+
+    Args:
+        dirname (str or py.path): directory to walk
+        file_re (re or str): only yield files whose path relative to dirname matches
+        dir_re (re or str): do not walk directories whose path relative to dirname matches
+        entries (bool): yield `os.DirEntry` instead of str [False]
+
+    Yields:
+        str or os.DirEntry: paths in sorted order
+    """
+    fr = _re(file_re)
+    dr = _re(dir_re)
+    stack = [iter(_sorted_scandir(str(py_path(dirname).realpath())))]
+    prefixes = ['']
+    while stack:
+        for e in stack[-1]:
+            r = prefixes[-1] + e.name
+            if e.is_dir(follow_symlinks=False):
+                if not (dr and dr.search(r)):
+                    stack.append(iter(_sorted_scandir(e.path)))
+                    prefixes.append(r + os.sep)
+                    break
+            elif not e.is_dir() and (not fr or fr.search(r)):
+                yield e if entries else e.path
+        else:
+            stack.pop()
+            prefixes.pop()
+
+
 def mkdir_parent(path):
     """Create the directories and their parents (if necessary)
 
@@ -89,6 +282,35 @@ def mkdir_parent_only(path):
     return mkdir_parent(py_path(path).dirname)
 
 
+def mmap_read(filename):
+    """Map file into memory read-only
+
+    The contents are not copied so large files can be searched
+    with `re` (using bytes patterns) or sliced cheaply. The mapping
+    is released when the result is garbage collected (or with
+    ``release()``).
+
+    Args:
+        filename (str or py.path.Local): file to map
+
+    Returns:
+        memoryview: read-only bytes (PY2: `mmap.mmap`)
+    """
+    import mmap
+
+    with open(str(py_path(filename)), 'rb') as f:
+        try:
+            m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files can't be mapped
+            if os.fstat(f.fileno()).st_size:
+                raise
+            return memoryview(b'')
+    if six.PY2:
+        return m
+    return memoryview(m)
+
+
 def py_path(path=None):
     """Creates a py.path.Local object
 
@@ -114,6 +336,38 @@ def py_path(path=None):
     return res
 
 
+def read_chunks(filename, size=None):
+    """Read binary file in chunks
+
+    Args:
+        filename (str or py.path.Local): file to read
+        size (int): bytes per chunk [1MB]
+
+    Yields:
+        bytes: chunks of `size` bytes (last may be shorter)
+    """
+    with open(str(py_path(filename)), 'rb') as f:
+        while True:
+            b = f.read(size or _READ_CHUNK_SIZE)
+            if not b:
+                return
+            yield b
+
+
+def read_lines(filename):
+    """Read text file with preferred encoding one line at a time
+
+    Args:
+        filename (str or py.path.Local): file to read
+
+    Yields:
+        str: lines including line endings
+    """
+    with io.open(str(py_path(filename)), encoding=_encoding()) as f:
+        for l in f:
+            yield l
+
+
 def read_text(filename):
     """Open file, read with preferred encoding text, and close.
 
@@ -124,7 +378,7 @@ def read_text(filename):
         str: contest of `filename`
     """
     fn = py_path(filename)
-    with io.open(str(fn), encoding=locale.getpreferredencoding()) as f:
+    with io.open(str(fn), encoding=_encoding()) as f:
         return f.read();
 
 
@@ -209,9 +463,7 @@ def walk_tree(dirname, file_re=None):
     Yields:
         py.path.local: paths in sorted order
     """
-    fr = file_re
-    if fr and not hasattr(fr, 'search'):
-        fr = re.compile(fr)
+    fr = _re(file_re)
     dirname = py_path(dirname).realpath()
     dn = str(dirname)
     res = []
@@ -225,17 +477,190 @@ def walk_tree(dirname, file_re=None):
     return sorted(res)
 
 
-def write_text(filename, contents):
+def walk_tree_parallel(dirname, file_re=None, dir_re=None, threads=None):
+    """Return sorted list of files (only) found by scanning directories in threads
+
+    Directories are read level by level with `os.scandir` in a
+    thread pool, since the work is mostly waiting on the file system.
+    Selection is the same as `iter_tree`, but the result is sorted by
+    path like `walk_tree`.
+
+    Args:
+        dirname (str or py.path): directory to walk
+        file_re (re or str): see `iter_tree`
+        dir_re (re or str): see `iter_tree`
+        threads (int): size of thread pool [8]
+
+    Returns:
+        list: str paths in sorted order
+    """
+    from multiprocessing.pool import ThreadPool
+
+    p = ThreadPool(threads or _TREE_THREADS)
+    try:
+        res = _walk_parallel(p, dirname, file_re, dir_re)
+    finally:
+        p.close()
+        p.join()
+    res.sort(key=lambda x: x[0])
+    return [e.path for r, e in res]
+
+
+def write_text(filename, contents, atomic=False, fsync=False):
     """Open file, write text with preferred encoding, and close.
 
+    `contents` is encoded once and written with a single write.
+    With `atomic`, the file is written with `atomic_open` so
+    readers never see a partial file.
+
     Args:
         filename (str or py.path.Local): File to open
         contents (str): New contents
+        atomic (bool): replace file atomically [False]
+        fsync (bool): sync to disk, implies `atomic` [False]
 
     Returns:
         py.path.local: `filename` as :class:`py.path.Local`
     """
     fn = py_path(filename)
-    with io.open(str(fn), 'w', encoding=locale.getpreferredencoding()) as f:
-        f.write(pkcompat.locale_str(contents))
+    b = pkcompat.locale_str(contents).encode(_encoding())
+    if atomic or fsync:
+        with atomic_open(fn, fsync=fsync) as f:
+            f.write(b)
+    else:
+        with open(str(fn), 'wb') as f:
+            f.write(b)
     return fn
+
+
+def _encoding():
+    """Preferred encoding, which is only looked up once
+
+    Returns:
+        str: `locale.getpreferredencoding`
+    """
+    global _preferred_encoding
+
+    if not _preferred_encoding:
+        _preferred_encoding = locale.getpreferredencoding()
+    return _preferred_encoding
+
+
+def _file_mode(filename):
+    """Permissions for a new file: existing file's mode or from umask
+
+    Args:
+        filename (str): file to be replaced
+
+    Returns:
+        int: mode bits
+    """
+    import stat
+
+    try:
+        return stat.S_IMODE(os.stat(filename).st_mode)
+    except OSError:
+        pass
+    return 0o666 & ~_umask()
+
+
+def _re(value):
+    """Compile value unless already compiled or None
+
+    Args:
+        value (re or str): regular expression
+
+    Returns:
+        re: compiled (or None)
+    """
+    if value and not hasattr(value, 'search'):
+        return re.compile(value)
+    return value
+
+
+def _scan_dir(item):
+    """Split entries of a directory into files and directories
+
+    Args:
+        item (tuple): directory path and its relative path prefix
+
+    Returns:
+        tuple: list of (relative path, `os.DirEntry`) for files and for directories
+    """
+    files = []
+    dirs = []
+    for e in _sorted_scandir(item[0]):
+        r = item[1] + e.name
+        if e.is_dir(follow_symlinks=False):
+            dirs.append((r, e))
+        elif not e.is_dir():
+            files.append((r, e))
+    return files, dirs
+
+
+def _sorted_scandir(dirname):
+    """Entries of dirname sorted by name
+
+    Args:
+        dirname (str): directory to read
+
+    Returns:
+        list: `os.DirEntry` objects (empty if dirname cannot be read)
+    """
+    try:
+        s = os.scandir
+    except AttributeError:
+        from scandir import scandir as s
+    try:
+        return sorted(s(dirname), key=lambda e: e.name)
+    except OSError:
+        return []
+
+
+def _umask():
+    """Current process umask
+
+    Read from ``/proc/self/status`` when available, because
+    `os.umask` can only read the umask by setting it, which races
+    with other threads creating files.
+
+    Returns:
+        int: umask bits
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for l in f:
+                if l.startswith('Umask:'):
+                    return int(l.split()[1], 8)
+    except IOError:
+        pass
+    res = os.umask(0o22)
+    os.umask(res)
+    return res
+
+
+def _walk_parallel(pool, dirname, file_re, dir_re):
+    """Scan directories a level at a time in pool
+
+    Args:
+        pool (ThreadPool): where to run `_scan_dir`
+        dirname (str or py.path): directory to walk
+        file_re (re or str): see `iter_tree`
+        dir_re (re or str): see `iter_tree`
+
+    Returns:
+        list: unsorted (relative path, `os.DirEntry`) for selected files
+    """
+    fr = _re(file_re)
+    dr = _re(dir_re)
+    res = []
+    level = [(str(py_path(dirname).realpath()), '')]
+    while level:
+        n = []
+        for files, dirs in pool.map(_scan_dir, level):
+            res.extend(x for x in files if not fr or fr.search(x[0]))
+            n.extend(
+                (e.path, r + os.sep) for r, e in dirs if not (dr and dr.search(r))
+            )
+        level = n
+    return res
@@ -73,13 +73,16 @@ def data_dir():
 def data_yaml(base_name):
     """Load base_name.yml from data_dir
 
+    The parsed file is cached (see `pykern.pkyaml.load_file`) so
+    tests which share data files only parse them once.
+
     Args:
         base_name (str): name of YAML file with ``.yml`` extension
 
     Returns:
         object: YAML data structure, usually dict or array
     """
-    return pkyaml.load_file(data_dir().join(base_name) + '.yml')
+    return pkyaml.load_file(data_dir().join(base_name) + '.yml', cache=True)
 
 
 def empty_work_dir():
@@ -7,62 +7,400 @@ u"""Wrapper for :mod:`yaml`
 from __future__ import absolute_import, division, print_function
 from pykern import pkcollections
 from pykern import pkcompat
+from pykern import pkconfig
 from pykern import pkinspect
 from pykern import pkio
 from pykern import pkresource
+import collections
+import os
 import py
+import re
+import threading
 import yaml
 
+#: Parsed files by name: (stat key, frozen value), least recently used first
+_cache = collections.OrderedDict()
 
-def load_file(filename):
+#: Protects `_cache`
+_cache_lock = threading.Lock()
+
+#: Characters of documents parsed by each task in `iter_documents`
+_CHUNK_SIZE = 1 << 20
+
+#: Matches a line which starts a document
+_DOCUMENT_START_RE = re.compile(r'---(?:\s|$)')
+
+
+def dump_file(filename, obj):
+    """Write obj as YAML to filename atomically
+
+    The YAML is emitted directly to a temporary file which replaces
+    `filename` when complete (see `pkio.atomic_open`). See
+    `dump_str` for the format. The file is written in the preferred
+    encoding. Non-ASCII characters are escaped unless it is UTF-8.
+
+    Args:
+        filename (str or py.path): where to write
+        obj (object): value to write
+    """
+    import codecs
+    import locale
+
+    e = locale.getpreferredencoding()
+    a = _dump_args()
+    a['allow_unicode'] = codecs.lookup(e).name == 'utf-8'
+    with pkio.atomic_open(filename, 'w', encoding=e) as f:
+        yaml.dump(obj, f, **a)
+
+
+def dump_str(obj):
+    """Convert obj to YAML
+
+    Uses libyaml (``CSafeDumper``) if available, else the pure Python
+    ``SafeDumper``. `pkcollections.Dict` (and `pkcollections.FrozenDict`)
+    are written as mappings with sorted keys, `pkcollections.OrderedMapping`
+    as mappings in insertion order, and tuples as sequences. Nested
+    collections are written in block style and strings are not escaped
+    to ASCII.
+
+    Args:
+        obj (object): value to convert
+
+    Returns:
+        str: YAML document
+    """
+    return yaml.dump(obj, **_dump_args())
+
+
+def iter_documents(filename, processes=None, chunk_size=None):
+    """Parse each document in a multi-document file
+
+    Documents are parsed as the file is read, so memory is bounded
+    by the size of the largest document. With `processes`, the file
+    is split into chunks of documents at lines which start with
+    ``---``, and the chunks are parsed in a `multiprocessing.Pool`.
+    Only a few chunks per process are outstanding at a time.
+    Documents are yielded in file order either way.
+
+    Args:
+        filename (str or py.path): file to read
+        processes (int): number of parsing processes [None: parse inline]
+        chunk_size (int): characters per chunk with `processes` [1MB]
+
+    Yields:
+        object: `pkcollections.Dict`, list, or scalar for each document
+    """
+    import io
+    import locale
+
+    f = io.open(
+        str(pkio.py_path(filename)),
+        encoding=locale.getpreferredencoding(),
+    )
+    p = None
+    try:
+        if not (processes and processes > 1):
+            for v in yaml.load_all(f, Loader=_Loader):
+                yield v
+            return
+        import multiprocessing
+
+        p = multiprocessing.Pool(processes)
+        pending = collections.deque()
+        for c in _document_chunks(f, chunk_size or _CHUNK_SIZE):
+            pending.append(p.apply_async(_load_documents, (c,)))
+            if len(pending) > processes * 2:
+                for v in pending.popleft().get():
+                    yield v
+        while pending:
+            for v in pending.popleft().get():
+                yield v
+    finally:
+        if p:
+            p.terminate()
+            p.join()
+        f.close()
+
+
+def load_file(filename, cache=False, frozen=False):
     """Read a file, making sure all keys and values are locale.
 
+    With `cache`, the parsed value is kept in memory (see
+    ``cfg.cache_max``) and reused until the file's mtime, size, or
+    inode changes. The cached value is frozen (see
+    `pkcollections.freeze`) so it can be shared. With `frozen`, the
+    shared value is returned. Otherwise, a mutable copy is returned,
+    which is still much faster than parsing. Values which can't be
+    frozen (recursive anchors) are not cached.
+
+    If ``cfg.disk_cache`` is set, cached files are also pickled next
+    to the file (``.<name>-<sha256>-py<version>.pkyaml``) so other
+    processes don't have to parse the file. The pickle is keyed by
+    the file's contents. It is not written if the directory is
+    not writable. Since unpickling can run code, a pickle is only
+    loaded if it is owned by the current user and is not writable
+    by group or others.
+
     Args:
         filename (str): file to read (Note: ``.yml`` will not be appended)
+        cache (bool): use the parsed file cache [False]
+        frozen (bool): return immutable value [False]
 
     Returns:
-        object: `pkcollections.Dict` or list
+        object: `pkcollections.Dict` or list (or `pkcollections.FrozenDict` or tuple)
     """
-    return load_str(pkio.read_text(filename))
+    if not cache:
+        res = load_str(pkio.read_text(filename))
+        return pkcollections.freeze(res) if frozen else res
+    fn = str(pkio.py_path(filename))
+    s = os.stat(fn)
+    k = (getattr(s, 'st_mtime_ns', s.st_mtime), s.st_size, s.st_ino)
+    with _cache_lock:
+        c = _cache.pop(fn, None)
+        if c and c[0] == k:
+            _cache[fn] = c
+            res = c[1]
+        else:
+            c = None
+    if not c:
+        v = _load_disk_cache(fn) if cfg.disk_cache else load_str(pkio.read_text(fn))
+        if _is_recursive(v, set(), set()):
+            assert not frozen, \
+                '{}: recursive value can not be frozen'.format(fn)
+            return v
+        res = pkcollections.freeze(v)
+        with _cache_lock:
+            _cache[fn] = (k, res)
+            while len(_cache) > cfg.cache_max:
+                _cache.popitem(last=False)
+    return res if frozen else pkcollections.thaw(res, deep=True)
 
 
-def load_resource(basename):
+def load_resource(basename, frozen=False):
     """Read a resource, making sure all keys and values are locale
 
+    The parsed resource is cached (see `load_file`).
+
     Args:
         basename (str): file to read without yml suffix
+        frozen (bool): return shared immutable value [False]
 
     Returns:
-        object: `pkcollections.Dict` or list
+        object: `pkcollections.Dict` or list (or `pkcollections.FrozenDict` or tuple)
     """
     return load_file(
-        pkresource.filename(basename + '.yml', pkinspect.caller_module()))
+        pkresource.filename(basename + '.yml', pkinspect.caller_module()),
+        cache=True,
+        frozen=frozen,
+    )
 
 
 def load_str(value):
     """Read a value, making sure all keys and values are locale.
 
+    Parses with libyaml (``CSafeLoader``) if available, else the
+    pure Python ``SafeLoader``, so only standard YAML tags are
+    allowed. Mappings are created as `pkcollections.Dict` during
+    parsing.
+
     Args:
         value (str): string to parse
 
     Returns:
         object: `pkcollections.Dict` or list
     """
-    return _fixup(yaml.load(value))
-
-
-def _fixup(obj):
-    """Convert all objects to locale strings"""
-    if isinstance(obj, dict):
-        res = pkcollections.Dict()
-        for k in obj:
-            res[pkcompat.locale_str(k)] = _fixup(obj[k])
-        return res
-    if isinstance(obj, list):
-        res = []
-        for v in obj:
-            res.append(_fixup(v))
-        return res
-    if type(obj) == bytes or type(obj) == str and hasattr(obj, 'decode'):
-        return pkcompat.locale_str(obj)
-    return obj
+    return yaml.load(value, Loader=_Loader)
+
+
+def _construct_mapping(loader, node):
+    """Create `pkcollections.Dict` with locale str keys
+
+    Yields the empty Dict first so recursive anchors work, like
+    `yaml.constructor.SafeConstructor.construct_yaml_map`.
+    """
+    res = pkcollections.Dict()
+    yield res
+    loader.flatten_mapping(node)
+    for k, v in node.value:
+        res[pkcompat.locale_str(loader.construct_object(k))] \
+            = loader.construct_object(v)
+
+
+def _construct_str(loader, node):
+    """Create locale str"""
+    return pkcompat.locale_str(loader.construct_scalar(node))
+
+
+def _document_chunks(f, chunk_size):
+    """Split f into strings of complete documents
+
+    Directives (``%YAML``, ``%TAG``) belong to the document which
+    follows them, so a chunk starts at the directives before ``---``.
+
+    Args:
+        f (file): text file
+        chunk_size (int): minimum characters per chunk
+
+    Yields:
+        str: one or more documents
+    """
+    buf = []
+    n = 0
+    # directives (and comments after them) not yet known to precede ---
+    directives = []
+    for l in f:
+        if l.startswith('%') or directives and (not l.strip() or l.startswith('#')):
+            directives.append(l)
+            continue
+        if n >= chunk_size and _DOCUMENT_START_RE.match(l):
+            yield ''.join(buf)
+            buf = []
+            n = 0
+        for x in directives:
+            buf.append(x)
+            n += len(x)
+        directives = []
+        buf.append(l)
+        n += len(l)
+    buf.extend(directives)
+    if buf:
+        yield ''.join(buf)
+
+
+def _dump_args():
+    """Keyword arguments to `yaml.dump`"""
+    return dict(
+        Dumper=_Dumper,
+        allow_unicode=True,
+        default_flow_style=False,
+        encoding=None,
+    )
+
+
+def _is_recursive(value, parents, done):
+    """Does value contain itself (e.g. ``a: &x {b: *x}``)?
+
+    Args:
+        value (object): parsed value
+        parents (set): ids of containers being checked
+        done (set): ids of containers which are not recursive
+
+    Returns:
+        bool: True if a container is its own descendant
+    """
+    if isinstance(value, dict):
+        c = value.values()
+    elif isinstance(value, list):
+        c = value
+    else:
+        return False
+    i = id(value)
+    if i in done:
+        return False
+    if i in parents:
+        return True
+    parents.add(i)
+    for v in c:
+        if _is_recursive(v, parents, done):
+            return True
+    parents.remove(i)
+    done.add(i)
+    return False
+
+
+def _load_documents(value):
+    """Parse all documents in value
+
+    Called in pool processes by `iter_documents`.
+
+    Args:
+        value (str): one or more documents
+
+    Returns:
+        list: parsed documents
+    """
+    return list(yaml.load_all(value, Loader=_Loader))
+
+
+def _load_disk_cache(filename):
+    """Load pickled parse of filename or parse and pickle
+
+    Args:
+        filename (str): absolute path
+
+    Returns:
+        object: parsed value
+    """
+    import glob
+    import hashlib
+    import locale
+    import pickle
+    import stat
+    import sys
+
+    with open(filename, 'rb') as f:
+        b = f.read()
+    d, n = os.path.split(filename)
+    p = '.{}-{{}}-py{}.pkyaml'.format(n, sys.version_info[0])
+    res = os.path.join(d, p.format(hashlib.sha256(b).hexdigest()))
+    try:
+        with open(res, 'rb') as f:
+            s = os.fstat(f.fileno())
+            if s.st_uid == os.getuid() and not s.st_mode & 0o022:
+                return pickle.load(f)
+    except Exception:
+        # Missing, truncated, or incompatible pickle: parse the file
+        pass
+    v = load_str(b.decode(locale.getpreferredencoding()))
+    try:
+        with pkio.atomic_open(res) as f:
+            pickle.dump(v, f, pickle.HIGHEST_PROTOCOL)
+        os.chmod(res, stat.S_IMODE(os.stat(res).st_mode) & ~0o022)
+        for x in glob.glob(os.path.join(d, p.format('*'))):
+            if x != res:
+                pkio.unchecked_remove(x)
+    except EnvironmentError:
+        # read-only directory (e.g. installed package)
+        pass
+    return v
+
+
+def _represent_dict(dumper, data):
+    """Mapping with sorted keys (insertion order if keys can't be compared)"""
+    i = list(dict.items(data))
+    try:
+        i = sorted(i)
+    except TypeError:
+        pass
+    return dumper.represent_mapping(u'tag:yaml.org,2002:map', i)
+
+
+def _represent_ordered_mapping(dumper, data):
+    """Mapping in insertion order"""
+    return dumper.represent_mapping(
+        u'tag:yaml.org,2002:map',
+        [(k, data[k]) for k in data],
+    )
+
+
+class _Dumper(getattr(yaml, 'CSafeDumper', yaml.SafeDumper)):
+    """Safe dumper (libyaml if available) which writes pkcollections types"""
+    pass
+
+
+class _Loader(getattr(yaml, 'CSafeLoader', yaml.SafeLoader)):
+    """Safe loader (libyaml if available) which creates Dicts and locale strings"""
+    pass
+
+
+_Dumper.add_multi_representer(pkcollections.Dict, _represent_dict)
+_Dumper.add_representer(pkcollections.OrderedMapping, _represent_ordered_mapping)
+_Dumper.add_representer(tuple, _Dumper.represent_list)
+_Loader.add_constructor(u'tag:yaml.org,2002:map', _construct_mapping)
+_Loader.add_constructor(u'tag:yaml.org,2002:str', _construct_str)
+
+
+cfg = pkconfig.init(
+    cache_max=(256, int, 'number of parsed files cached in memory by load_file'),
+    disk_cache=(False, bool, 'pickle parsed files next to files cached by load_file'),
+)
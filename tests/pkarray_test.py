@@ -33,3 +33,58 @@ def test_new_float():
         'new_float with initializer, should be non-zero'
     assert float(5) == d[1], \
         'new_float should intitialize to a float'
+
+
+def test_table():
+    from pykern import pkcollections
+    from pykern.pkunit import pkeq, pkexcept, pkok
+
+    t = pkarray.Table([
+        ('x', pkarray.new_double([0])),
+        ('y', pkarray.new_float([1])),
+        ('name', ['a']),
+    ])
+    pkeq(1, len(t))
+    pkarray.table_append(t, (2, 3, 'b'), dict(x=4, y=5, name='c'))
+    pkeq(3, len(t))
+    pkeq(['x', 'y', 'name'], pkarray.table_columns(t))
+    pkeq(pkarray.new_double([0, 2, 4]), t.x)
+    pkok(t.y is t['y'], 'columns should not be copied')
+    r = t[-1]
+    pkeq(4.0, r.x)
+    pkeq('c', r['name'])
+    pkeq(dict(x=4.0, y=5.0, name='c'), pkcollections.map_to_dict(r))
+    r.y = 6
+    pkeq(6.0, t.y[2])
+    pkeq(['a', 'b', 'c'], [r.name for r in t])
+    with pkexcept(IndexError):
+        t[3]
+    with pkexcept(AttributeError):
+        r.z
+    with pkexcept('does not match'):
+        t.z = [1]
+    pkok('z' not in pkarray.table_columns(t), 'invalid column should not be added')
+    t.z = pkarray.map_column(lambda v: v * 2, t.x)
+    pkeq(pkarray.new_double([0, 4, 8]), t.z)
+    pkeq(['A', 'B', 'C'], pkarray.map_column(str.upper, t.name))
+    with pkexcept('does not match'):
+        pkarray.table_append(t, (1, 2))
+    with pkexcept(TypeError):
+        pkarray.table_append(t, (5, 6, 'd', 7), (1.0, 'bad', 'e', 8))
+    pkeq([3] * 4, [len(t[k]) for k in pkarray.table_columns(t)])
+    t = pkarray.Table([('a', pkarray.FLOAT_TYPECODE), ('b', None)])
+    pkeq(0, len(t))
+    pkarray.table_append(t, (1, 2))
+    pkeq([2], t.b)
+
+
+def test_to_numpy():
+    numpy = pytest.importorskip('numpy')
+    from pykern.pkunit import pkeq
+
+    d = pkarray.new_double([1, 2])
+    n = pkarray.to_numpy(d)
+    pkeq(numpy.float64, n.dtype)
+    d[0] = 3
+    pkeq(3.0, n[0])
+    pkeq([1, 2], list(pkarray.to_numpy([1, 2])))
@@ -57,3 +57,18 @@ def test_read_all():
         pkeq(v, m.version)
         pkeq('docker', m.image.type)
         pkeq('1.1', m.codes.py2.code1.version)
+        pkjson.dump_pretty(
+            {
+                'version': v,
+                'image': {'type': 'docker', 'tags': ['c']},
+                'codes': {'py2': {'code0': {'version': '0.1'}}},
+            },
+            filename=rsmanifest.CONTAINER_FILE,
+        )
+        u = pkjson.load_any(pkio.py_path(rsmanifest.USER_FILE))
+        u.image = {'tags': ['u']}
+        pkjson.dump_pretty(u, filename=rsmanifest.USER_FILE)
+        m = rsmanifest.read_all()
+        pkeq(['u'], m.image.tags)
+        pkeq('docker', m.image.type)
+        pkeq(['code0', 'code1'], sorted(m.codes.py2))
@@ -11,10 +11,58 @@ from pykern.pkunit import pkok, pkexcept, pkeq
 import pytest
 import random
 import string
+import sys
 
 _VALUE = 1
 
 
+def test_copy():
+    import copy
+    import pickle
+
+    n, order = _random_init()
+    n.x = [1]
+    for c in copy.copy(n), copy.deepcopy(n), pickle.loads(pickle.dumps(n)):
+        assert n == c, \
+            'copies should have same keys, values, and order'
+    c = copy.deepcopy(n)
+    c.x.append(2)
+    assert [1] == n.x, \
+        'deepcopy should copy values'
+
+
+def test_deep_merge():
+    b = pkcollections.json_load_any(
+        '{"a": {"b": 1, "c": [1]}, "d": {"e": 2}, "f": [3], "g": 4}',
+    )
+    n = {'a': {'b': 5, 'c': [2]}, 'f': None, 'h': {'i': 6}}
+    r = pkcollections.deep_merge(b, n)
+    pkeq(
+        {'a': {'b': 5, 'c': [2, 1]}, 'd': {'e': 2}, 'f': None, 'g': 4, 'h': {'i': 6}},
+        r,
+    )
+    pkeq(pkcollections.Dict, type(r))
+    pkeq(1, b.a.b)
+    pkeq([1], b.a.c)
+    pkok(r.d is b.d, 'unchanged subtrees should be shared')
+    pkok(r.h is n['h'], 'new subtrees should be shared')
+    pkok(pkcollections.deep_merge(b, {'a': {'b': 1}}, {}) is b, 'no changes returns base')
+    r = pkcollections.deep_merge(b, {'a': {'c': [2]}}, {'a': {'c': [3]}}, prepend_lists=False)
+    pkeq([3], r.a.c)
+    with pkexcept('a.c: type mismatch'):
+        pkcollections.deep_merge(b, {'a': {'c': 2}})
+    f = pkcollections.freeze(b)
+    r = pkcollections.deep_merge(f, {'a': {'b': 7}})
+    pkeq(pkcollections.FrozenDict, type(r))
+    pkeq(pkcollections.FrozenDict, type(r.a))
+    pkeq(7, r.a.b)
+    pkok(r.d is f.d, 'unchanged frozen subtrees should be shared')
+    o = OrderedMapping(x=OrderedMapping(y=1))
+    r = pkcollections.deep_merge(o, {'x': {'z': 2}})
+    pkeq(['y', 'z'], list(r.x))
+    pkeq(['y'], list(o.x))
+
+
 def test_delattr():
     n = OrderedMapping()
     with pytest.raises(AttributeError):
@@ -71,6 +119,35 @@ def test_dict():
         n['missing key']
 
 
+def test_dict_getattr():
+    """Keys are read as attributes unless they collide"""
+    n = pkcollections.json_load_any('{"a": {"b": null}, "keys": 1}')
+    pkeq(None, n.a.b)
+    pkok(hasattr(n.a, 'b'), 'key with None value should be an attribute')
+    pkok(not hasattr(n.a, 'c'), 'missing key should not be an attribute')
+    pkeq(['a', 'keys'], sorted(n.keys()))
+    pkeq(1, n['keys'])
+    with pkexcept('c: not a key or attribute'):
+        n.c
+
+
+def test_dict_subclass():
+    """Subclass attributes are reserved"""
+
+    class _D(Dict):
+        def method1(self):
+            pass
+
+    n = _D()
+    with pkexcept(pkcollections.DictNameError):
+        n.method1 = 1
+    n.method2 = 2
+    pkeq(2, n.method2)
+    n = Dict()
+    n.method1 = 1
+    pkeq(1, n.method1)
+
+
 def test_eq():
     assert not OrderedMapping() == None, \
         'OrderedMapping compared to None is false'
@@ -94,6 +171,56 @@ def test_eq():
         'OrderedMappings with different orders are not equal'
 
 
+def test_frozen_dict():
+    import copy
+    import pickle
+
+    v = {'a': 1, 'b': {'c': [1, {'d': 2}]}}
+    f = pkcollections.FrozenDict(v)
+    pkeq(2, f.b.c[1].d)
+    pkok(isinstance(f.b, pkcollections.FrozenDict), 'nested dicts should be frozen')
+    pkeq(tuple, type(f.b.c))
+    pkeq(hash(f), hash(pkcollections.freeze(v)))
+    pkeq({f: 1}[pkcollections.freeze(v)], 1)
+    pkok(copy.deepcopy(f) is f, 'deepcopy should share')
+    pkok(pkcollections.freeze(f) is f, 'freeze should share')
+    pkeq(f, pickle.loads(pickle.dumps(f)))
+    for op in (
+        lambda: setattr(f, 'x', 1),
+        lambda: f.__setitem__('a', 2),
+        lambda: f.__delitem__('a'),
+        lambda: f.update(a=2),
+        lambda: f.pop('a'),
+        lambda: f.b.setdefault('x', 1),
+        lambda: f.__ior__({'a': 2, 'b': [1]}),
+        lambda: f.__init__({'a': 2}),
+    ):
+        with pkexcept(TypeError):
+            op()
+    pkeq(1, f.a)
+    pkeq(hash(f), hash(pkcollections.freeze(v)))
+    if sys.version_info >= (3, 9):
+        g = f
+        with pkexcept(TypeError):
+            g |= {'a': 2, 'b': [1]}
+        pkeq(pkcollections.freeze(v), f)
+
+
+def test_thaw():
+    f = pkcollections.freeze({'a': 1, 'b': {'c': [1]}})
+    t = pkcollections.thaw(f)
+    t.a = 2
+    pkeq(1, f.a)
+    pkok(t.b is f.b, 'thaw should share nested values')
+    t.b = pkcollections.thaw(t.b)
+    t.b.c = pkcollections.thaw(t.b.c)
+    t.b.c.append(2)
+    pkeq((1,), f.b.c)
+    pkeq({'a': 2, 'b': {'c': [1, 2]}}, t)
+    t = pkcollections.thaw(f, deep=True)
+    pkeq(list, type(t.b.c))
+
+
 def test_getitem():
     n = OrderedMapping(a=1)
     assert 1 == n['a'], \
@@ -152,7 +279,39 @@ def test_json_load_any():
     )
     j = json.dumps({'a': 33, 'b': {'values': 'will collide, but ok'}})
     j2 = pkcollections.json_load_any(j)
+    pkeq(pkcollections.Dict, type(j2.b))
+    pkeq('will collide, but ok', j2.b['values'])
     pkcollections.json_load_any(j, object_pairs_hook=pkcollections.Dict)
+    pkeq(j2, pkcollections.json_load_any(j, object_pairs_hook=pkcollections.object_pairs_hook))
+
+
+def test_lazy_items():
+    n = OrderedMapping(a=1)
+    n.b = -2
+    n.c = 3
+    v = pkcollections.lazy_items(n)
+    f = v.filter(lambda k, x: x > 0)
+    pkeq([('a', 1), ('b', -2), ('c', 3)], list(v))
+    pkeq(['a', 'c'], list(f.iter_keys()))
+    m = f.map_values(lambda x: x * 10).map(lambda k, x: (k.upper(), x))
+    pkeq({'A': 10, 'C': 30}, dict(m))
+    n.d = 4
+    pkeq([10, 30, 40], list(f.map_values(lambda x: x * 10).iter_values()))
+    pkeq([1, -2, 3, 4], list(v.iter_values()))
+
+
+def test_iter_items():
+    n = OrderedMapping(a=1)
+    n.b = 2
+    i = pkcollections.iter_items(n)
+    pkok(not isinstance(i, list), 'iter_items should not return a list')
+    pkeq([('a', 1), ('b', 2)], list(i))
+    pkeq([(2, 'a'), (3, 'b')], list(pkcollections.iter_items(n, lambda k, v: (v + 1, k))))
+    pkeq(['a', 'b'], list(pkcollections.iter_keys(n)))
+    pkeq(['aa', 'bb'], list(pkcollections.iter_keys(n, lambda k: k * 2)))
+    pkeq([1, 2], list(pkcollections.iter_values(n)))
+    pkeq([2, 4], list(pkcollections.iter_values(n, lambda v: v * 2)))
+    pkeq({'a': 1, 'b': 2}, pkcollections.map_to_dict(n))
 
 
 def test_len():
@@ -214,6 +373,89 @@ def test_mapping_merge():
         'mapping_merge with dict should replace and add'
 
 
+def test_path():
+    n = pkcollections.json_load_any(
+        '{"models": {"beams": [{"energy": 1.5}], "grid": {"nx": 3}}}',
+    )
+    p = pkcollections.path('models.beams.0.energy')
+    pkok(p is pkcollections.path('models.beams.0.energy'), 'paths should be cached')
+    pkeq(('models', 'beams', '0', 'energy'), p.parts)
+    pkeq(1.5, p.get(n))
+    pkeq(3, n.nested_get('models.grid.nx'))
+    pkok(p.exists(n), 'path should exist')
+    pkok(not pkcollections.path('models.beams.1').exists(n), 'index out of range')
+    pkok(not pkcollections.path('models.grid.nx.y').exists(n), 'not a container')
+    pkeq(None, pkcollections.path('models.x').get(n, None))
+    with pkexcept(KeyError):
+        pkcollections.path('models.x').get(n)
+    p.set(n, 2.5)
+    pkeq(2.5, n.models.beams[0].energy)
+    pkcollections.path('models.undulator.period').set(n, 0.1)
+    pkeq(0.1, n.models.undulator.period)
+    pkcollections.path('models.undulator.period').delete(n)
+    pkeq({}, n.models.undulator)
+    pkcollections.path('models.beams.0').delete(n)
+    pkeq([], n.models.beams)
+    with pkexcept(KeyError):
+        pkcollections.path('models.undulator.period').delete(n)
+
+
+def test_nested_update():
+    n = pkcollections.Dict(a=pkcollections.Dict(b=[1, 2]), c=OrderedMapping())
+    pkcollections.nested_update(
+        n,
+        [
+            ('a.b.1', 3),
+            ('a.d', 4),
+            ('c.x', 5),
+            ('c.y', 6),
+            ('e.f.g', 7),
+            ('h', {}),
+            (pkcollections.path('h.i'), 8),
+        ],
+    )
+    pkeq([1, 3], n.a.b)
+    pkeq(4, n.a.d)
+    pkeq(['x', 'y'], list(n.c))
+    pkeq(7, n.e.f.g)
+    pkeq({'i': 8}, n.h)
+    n = pkcollections.Dict()
+    pkcollections.nested_update(n, OrderedMapping([('ab', 1), ('c.d', 2)]))
+    pkeq({'ab': 1, 'c': {'d': 2}}, n)
+    pkcollections.nested_update(n, {'c.e': 3})
+    pkeq(3, n.c.e)
+
+
+def test_record_type():
+    from pykern import pkjson
+
+    P = pkcollections.record_type('Particle', ['x', 'y', 'px'])
+    p = P(1.0, 2.0, px=0.5)
+    pkeq(2.0, p.y)
+    pkeq(0.5, p['px'])
+    pkeq(['x', 'y', 'px'], list(p))
+    pkeq([('x', 1.0), ('y', 2.0), ('px', 0.5)], pkcollections.map_items(p))
+    pkeq(3, len(p))
+    pkok('x' in p and 'z' not in p, 'contains should check fields')
+    pkeq('Particle(x=1.0, y=2.0, px=0.5)', repr(p))
+    pkeq(None, P().x)
+    p['x'] = 3.0
+    pkeq(3.0, p.x)
+    with pkexcept(KeyError):
+        p['z']
+    with pkexcept(AttributeError):
+        p.z = 1
+    with pkexcept('unknown fields'):
+        P(z=1)
+    with pkexcept('too many values'):
+        P(1, 2, 3, 4)
+    with pkexcept('may not begin with underscore'):
+        pkcollections.record_type('X', ['_a'])
+    p2 = P(**pkjson.load_any(pkjson.dump_pretty(p)))
+    pkeq(p, p2)
+    pkeq([p2], [P(**x) for x in pkjson.load_any(pkjson.dump_pretty([p], pretty=False))])
+
+
 def test_repr():
     n = OrderedMapping()
     assert 'OrderedMapping()' == repr(n), \
@@ -24,9 +24,25 @@ def test_all_modules_in_load_path(monkeypatch):
     assert ['m11', 'm12', 'm13'] == sorted(p1.s1.all_modules().keys())
     import p2.s1
     x = p2.s1.all_modules()
+    assert 'p2.s1.m13' not in sys.modules, \
+        'modules should not be imported until accessed'
+    assert 'm13' in x and 'not_found' not in x
+    assert 'p2.s1.m13' not in sys.modules, \
+        'membership should not import module'
     assert 'p2.s1.m11' == x['m11'].__name__
     assert 'p1.s1.m12' == x['m12'].__name__
-    assert 'p2.s1.m13' == x['m13'].__name__
+    assert 'p2.s1.m13' == x.m13.__name__
+    assert x.m13 is sys.modules['p2.s1.m13']
+    with pytest.raises(KeyError):
+        x['not_found']
+    with pytest.raises(AttributeError):
+        x.not_found
+    m = [x[k].__name__ for k in x]
+    for k in m:
+        del sys.modules[k]
+    pkconfig.all_modules_in_load_path(p1.s1, preload=True)
+    assert all(k in sys.modules for k in m), \
+        'preload should import all modules'
 
 
 def test_channel_in(monkeypatch):
@@ -88,6 +88,121 @@ def test_unchecked_remove():
             pkio.unchecked_remove('/')
 
 
+def test_atomic_open():
+    """File is replaced only on success and keeps its mode"""
+    from pykern import pkunit
+    from pykern import pkio
+    from pykern.pkunit import pkeq, pkexcept, pkok
+
+    with pkunit.save_chdir_work() as pwd:
+        with pkio.atomic_open('f', fsync=True) as f:
+            f.write(b'one')
+        pkeq('one', pkio.read_text('f'))
+        os.chmod('f', 0o604)
+        with pkexcept(ValueError):
+            with pkio.atomic_open('f', 'w', encoding='utf-8') as f:
+                f.write(u'two')
+                raise ValueError('abort')
+        pkeq('one', pkio.read_text('f'))
+        pkeq(['f'], os.listdir('.'))
+        with pkio.atomic_open('f', 'w', encoding='utf-8') as f:
+            f.write(u'\xe9')
+        pkeq(b'\xc3\xa9', pwd.join('f').read_binary())
+        pkeq(0o604, os.stat('f').st_mode & 0o777)
+        pkio.write_text('g', 'three', atomic=True)
+        pkeq('three', pkio.read_text('g'))
+        pkeq(['f', 'g'], sorted(os.listdir('.')))
+        os.symlink('g', 'h')
+        pkio.write_text('h', 'four', atomic=True)
+        pkok(os.path.islink('h'), 'symlink replaced by file')
+        pkeq('four', pkio.read_text('g'))
+        u = os.umask(0o077)
+        try:
+            pkio.write_text('i', 'five', atomic=True)
+        finally:
+            os.umask(u)
+        pkeq(0o600, os.stat('i').st_mode & 0o777)
+
+
+def test_hash_tree():
+    """Manifest is sorted and unchanged files are not rehashed"""
+    from pykern import pkunit
+    from pykern import pkio
+    from pykern.pkunit import pkeq
+    import hashlib
+    import json
+
+    def _h(value):
+        return hashlib.sha256(value.encode('ascii')).hexdigest()
+
+    with pkunit.save_chdir_work() as pwd:
+        for f in ('b/y', 'a-b', 'b/skip/z', 'a/x'):
+            pkio.mkdir_parent_only(f)
+            pkio.write_text(f, f)
+        expect = [str(pwd.join(f)) for f in ('a-b', 'a/x', 'b/skip/z', 'b/y')]
+        pkeq(expect, pkio.walk_tree_parallel('.', threads=2))
+        pkeq(sorted(pkio.iter_tree('.')), pkio.walk_tree_parallel(pwd))
+        pkeq(expect[:2], pkio.walk_tree_parallel('.', file_re='^a', dir_re='^b'))
+        m = pkio.hash_tree('.', cache_file='c.json')
+        pkeq(['a-b', 'a/x', 'b/skip/z', 'b/y'], list(m.keys()))
+        pkeq(_h('b/y'), m['b/y'])
+        pkeq(m, pkio.hash_tree('.', cache_file='c.json'))
+        # prove the cache is used for unchanged files
+        c = json.loads(pkio.read_text('c.json'))
+        c['files']['a/x'][3] = 'cached'
+        pkio.write_text('c.json', json.dumps(c))
+        pkio.write_text('b/y', 'changed')
+        m = pkio.hash_tree('.', cache_file='c.json', dir_re='skip')
+        pkeq('cached', m['a/x'])
+        pkeq(_h('changed'), m['b/y'])
+        pkeq(3, len(m))
+        pkeq(
+            hashlib.md5(b'a-b').hexdigest(),
+            pkio.hash_tree('.', cache_file='c.json', algorithm='md5')['a-b'],
+        )
+
+
+def test_readers():
+    """read_lines, read_chunks, and mmap_read"""
+    from pykern import pkunit
+    from pykern import pkio
+    from pykern.pkunit import pkeq
+    import re
+
+    with pkunit.save_chdir_work():
+        pkio.write_text('t', 'a\nbc\n\nd')
+        pkeq(['a\n', 'bc\n', '\n', 'd'], list(pkio.read_lines('t')))
+        pkeq([b'a\nb', b'c\n\n', b'd'], list(pkio.read_chunks('t', 3)))
+        pkeq([b'a\nbc\n\nd'], list(pkio.read_chunks('t')))
+        m = pkio.mmap_read('t')
+        pkeq(b'bc', m[2:4])
+        pkeq([b'a', b'bc', b'd'], re.findall(br'\w+', m))
+        pkio.write_text('e', '')
+        pkeq(0, len(pkio.mmap_read('e')))
+        pkeq([], list(pkio.read_chunks('e')))
+
+
+def test_iter_tree():
+    """Streams files in per-directory sorted order with pruning"""
+    from pykern import pkunit
+    from pykern import pkio
+    from pykern.pkunit import pkeq
+
+    with pkunit.save_chdir_work() as pwd:
+        for f in ('a/x', 'a-b', 'a/skip/y', 'c', 'a/d/z'):
+            pkio.mkdir_parent_only(f)
+            pkio.write_text(f, '')
+        os.symlink(str(pwd.join('a')), 'link')
+        expect = [str(pwd.join(f)) for f in ('a/d/z', 'a/skip/y', 'a/x', 'a-b', 'c')]
+        pkeq(expect, list(pkio.iter_tree('.')))
+        pkeq(sorted(expect), [str(p) for p in pkio.walk_tree('.')])
+        pkeq(expect[:1] + expect[2:], list(pkio.iter_tree('.', dir_re='^a/skip$')))
+        pkeq(expect[1:2], list(pkio.iter_tree(pwd, file_re=r'skip')))
+        e = list(pkio.iter_tree('.', file_re='^c$', entries=True))
+        pkeq(['c'], [x.name for x in e])
+        pkeq(0, e[0].stat().st_size)
+
+
 def test_walk_tree_and_sorted_glob():
     """Looks in work_dir"""
     from pykern import pkunit
@@ -17,3 +17,268 @@ def test_load_any():
     j = json.dumps(['a', 'b'])
     j2 = pkjson.load_any(j)
     pkeq('a', j2[0])
+
+
+def test_dump_pretty_stream():
+    from pykern import pkjson
+    from pykern import pkunit
+    from pykern.pkcollections import Dict
+    from pykern.pkunit import pkeq, pkok
+    import gzip
+    import os
+
+    v = Dict(b=[1, 2.5, None], a=Dict(c=u'\xe9', d=True), e=[Dict()] * 3)
+    d = pkunit.empty_work_dir()
+    for pretty in True, False:
+        p = d.join('x.json')
+        expect = pkjson.dump_pretty(v, pretty=pretty)
+        pkeq(None, pkjson.dump_pretty(v, p, pretty=pretty, stream=True))
+        pkeq(expect, p.read())
+        g = d.join('x.json.gz')
+        for stream in True, False:
+            pkjson.dump_pretty(v, g, pretty=pretty, stream=stream)
+            with gzip.open(str(g), 'rb') as f:
+                pkeq(expect, f.read().decode('utf-8'))
+    os.chmod(str(p), 0o640)
+    expect = pkjson.dump_pretty(v)
+    pkjson.dump_pretty(v, p, stream=True)
+    pkeq(0o640, p.stat().mode & 0o777)
+    with pkunit.pkexcept(TypeError):
+        pkjson.dump_pretty(dict(x=object()), p, stream=True)
+    pkeq(expect, p.read())
+    pkeq(['x.json', 'x.json.gz'], sorted(x.basename for x in d.listdir()))
+
+
+def test_iter_items():
+    from pykern import pkcollections
+    from pykern import pkjson
+    from pykern import pkunit
+    from pykern.pkunit import pkeq, pkexcept, pkok
+    import gzip
+    import json
+
+    v = {
+        'issues': [
+            {'n': 12345, 'title': u'aé "b"', 'labels': [{'name': 'x'}]},
+            {'n': -1.5e3, 'title': None, 'labels': []},
+            {'n': 3, 'items': True},
+        ],
+        'skipped': {'issues': [1], 'item': [2, {'x': [3]}]},
+        'total': 12,
+    }
+    j = json.dumps(v, indent=1)
+    d = pkunit.empty_work_dir()
+    p = d.join('x.json')
+    p.write(j)
+    for c in 1, 5, None:
+        r = list(pkjson.iter_items(p, 'issues.item', chunk_size=c))
+        pkeq(v['issues'], r)
+        pkeq(pkcollections.Dict, type(r[0].labels[0]))
+    pkeq(['x'], [x.name for x in pkjson.iter_items(p, 'issues.item.labels.item', chunk_size=3)])
+    pkeq([12345, -1500.0, 3], list(pkjson.iter_items(str(p), 'issues.item.n', chunk_size=2)))
+    pkeq([12], list(pkjson.iter_items(p, 'total', chunk_size=2)))
+    pkeq([], list(pkjson.iter_items(p, 'not.found')))
+    pkeq([v], list(pkjson.iter_items(p, '')))
+    g = d.join('x.json.gz')
+    with gzip.open(str(g), 'wb') as f:
+        f.write(j.encode('utf-8'))
+    pkeq(v['issues'], list(pkjson.iter_items(g, 'issues.item', chunk_size=7)))
+    p.write('[1, {"a": 2}]')
+    with open(str(p), 'rb') as f:
+        pkeq([1, {'a': 2}], list(pkjson.iter_items(f, 'item')))
+    p.write('[1, 2')
+    with pkexcept(ValueError):
+        list(pkjson.iter_items(p, 'item', chunk_size=2))
+    p.write('[1, 2] x')
+    with pkexcept('extra data'):
+        list(pkjson.iter_items(p, 'item'))
+    # Large values are not re-parsed once per chunk
+    p.write(json.dumps([{'a': 'x' * 100000}]))
+    with open(str(p), 'rb') as f:
+        r = _CountReads(f)
+        pkeq(100000, len(list(pkjson.iter_items(r, 'item', chunk_size=10))[0].a))
+    pkok(r.count < 50, '{} reads for a large value', r.count)
+
+
+def test_encoder():
+    """simplejson and json produce identical output"""
+    from pykern import pkjson
+    from pykern.pkcollections import Dict
+    from pykern.pkunit import pkeq, pkexcept
+    import collections
+    import decimal
+    import json
+
+    simplejson = pytest.importorskip('simplejson')
+    N = collections.namedtuple('N', 'x y')
+    v = Dict(
+        z=[1, -2.5e-300, 1e22, None, True, u'\xe9☃"\\\n'],
+        a=Dict(b=N(1, 'y'), c=(), d=Dict(), e=[]),
+        f=[Dict(g=[[]])] * 2,
+    )
+    try:
+        for pretty in True, False:
+            pkjson._encoder_module = json
+            expect = pkjson.dump_pretty(v, pretty=pretty)
+            pkjson._encoder_module = simplejson
+            pkeq(expect, pkjson.dump_pretty(v, pretty=pretty))
+        for m in json, simplejson:
+            pkjson._encoder_module = m
+            with pkexcept(TypeError):
+                pkjson.dump_pretty(dict(a=decimal.Decimal('1.1')))
+    finally:
+        pkjson._encoder_module = None
+
+
+def test_lines():
+    from pykern import pkjson
+    from pykern import pkunit
+    from pykern.pkcollections import Dict
+    from pykern.pkunit import pkeq, pkok
+
+    names = ['x.jsonl', 'x.jsonl.gz']
+    try:
+        pkjson._lzma()
+        names.append('x.jsonl.xz')
+    except ImportError:
+        pass
+    d = pkunit.empty_work_dir()
+    v = [Dict(i=i, s=u'\xe9\n' * (i % 3), a=[Dict(b=i)]) for i in range(500)]
+    for n in names:
+        p = d.join(n)
+        pkeq(200, pkjson.append_lines(p, v[:200]))
+        pkeq(300, pkjson.append_lines(p, iter(v[200:])))
+        pkeq(v, list(pkjson.iter_lines(p)))
+        pkeq(v, list(pkjson.iter_lines(p, chunk_size=100)))
+        x = list(pkjson.iter_lines(p, processes=3, chunk_size=1000))
+        pkeq(v, x)
+        pkeq(Dict, type(x[-1].a[0]))
+    p = d.join('blank.jsonl')
+    p.write('\n{"a": 1}\n\n[2]')
+    pkeq([dict(a=1), [2]], list(pkjson.iter_lines(p)))
+    p = d.join('big.jsonl')
+    pkjson.append_lines(p, (Dict(i=i, s='x' * 50) for i in range(20000)))
+    with open(str(p), 'rb') as f:
+        i = pkjson.iter_lines(f, processes=2, chunk_size=1000)
+        pkeq(0, next(i).i)
+        # at most processes * 2 + 1 chunks outstanding plus the one read ahead
+        pkok(f.tell() <= 1000 * 7, '{}: read too far ahead', f.tell())
+        i.close()
+
+
+def test_typed_arrays():
+    from pykern import pkarray
+    from pykern import pkjson
+    from pykern import pkunit
+    from pykern.pkcollections import Dict
+    from pykern.pkunit import pkeq, pkexcept
+    import array
+    import json
+
+    v = Dict(
+        d=pkarray.new_double([1.5, -2.25, 1e300]),
+        i=array.array(str('i'), [-3, 0, 7]),
+        B=array.array(str('B'), [0, 255]),
+        e=pkarray.new_float(),
+    )
+    pkeq(dict(B=[0, 255], d=[1.5, -2.25, 1e300], e=[], i=[-3, 0, 7]), json.loads(pkjson.dump_pretty(v)))
+    s = pkjson.dump_pretty(v, typed_arrays=True)
+    pkeq(
+        dict(dtype='<f8', shape=[3], data='AAAAAAAA+D8AAAAAAAACwJx1AIg85Dd+'),
+        json.loads(s)['d'][pkjson.TYPED_ARRAY_KEY],
+    )
+    pkeq(v, pkjson.load_any(s, typed_arrays=True))
+    for k in v:
+        pkeq(v[k].typecode, pkjson.load_any(s, typed_arrays=True)[k].typecode)
+    p = pkunit.empty_work_dir().join('x.json')
+    pkjson.dump_pretty(v, p, stream=True, typed_arrays=True)
+    pkeq(s, p.read())
+    with pkexcept(TypeError):
+        pkjson.dump_pretty(array.array(str('u'), u'ab'), typed_arrays=True)
+
+
+def test_typed_arrays_numpy():
+    from pykern import pkjson
+    from pykern.pkunit import pkeq, pkok
+
+    numpy = pytest.importorskip('numpy')
+    v = dict(
+        a=numpy.arange(12, dtype='>i4').reshape(3, 4),
+        b=numpy.array([1.5, 2.5], dtype='f4')[::-1],
+        c=numpy.array([True, False]),
+    )
+    pkeq([[0, 1, 2, 3], [4, 5, 6, 7], [8, 9, 10, 11]], pkjson.load_any(pkjson.dump_pretty(v)).a)
+    r = pkjson.load_any(pkjson.dump_pretty(v, typed_arrays=True), numpy=True)
+    for k in v:
+        pkok(numpy.array_equal(v[k], r[k]), '{}: not equal', k)
+        pkeq(v[k].dtype.newbyteorder('='), r[k].dtype)
+    pkeq((3, 4), r.a.shape)
+
+
+def test_canonical_hash():
+    from pykern import pkcollections
+    from pykern import pkjson
+    from pykern.pkunit import pkeq, pkexcept, pkok
+    import array
+    import collections
+    import hashlib
+
+    def _expect(s):
+        return hashlib.sha256(s.encode('ascii')).hexdigest()
+
+    v = pkcollections.Dict(
+        b=[1.0, -0.0, 2.5, 2.5e-7, 3, None, True, False],
+        a=pkcollections.OrderedMapping(z=u'\xe9"', y=()),
+    )
+    s = '{"a":{"y":[],"z":"\\u00e9\\""},"b":[1,0,2.5,2.5e-07,3,null,true,false]}'
+    pkeq(_expect(s), pkjson.canonical_hash(v))
+    pkeq(_expect(s), pkjson.canonical_hash(pkcollections.freeze(v)))
+    pkeq(
+        hashlib.md5(s.encode('ascii')).hexdigest(),
+        pkjson.canonical_hash(v, algorithm='md5'),
+    )
+    pkeq(pkjson.canonical_hash([2 ** 53]), pkjson.canonical_hash([2.0 ** 53]))
+    pkeq(_expect('[1e+300]'), pkjson.canonical_hash([1e300]))
+    pkok(
+        pkjson.canonical_hash(dict(a=1)) != pkjson.canonical_hash(dict(a=True)),
+        'bool and int must hash differently',
+    )
+    f = pkcollections.FrozenDict(x=list(range(10000)))
+    l = [f] * 3
+    s = '[' + ','.join([pkjson.dump_pretty(f, pretty=False).replace(' ', '')] * 3) + ']'
+    pkeq(_expect(s), pkjson.canonical_hash(l))
+    pkeq(_expect(s), pkjson.canonical_hash(l))
+    pkok(id(f) in pkjson._canonical_memo, 'FrozenDict encoding not memoized')
+    i = id(f)
+    del f, l
+    pkok(i not in pkjson._canonical_memo, 'memo not freed with FrozenDict')
+    g = pkcollections.freeze(dict(a=dict(b=dict(c=1))))
+    h = pkjson.canonical_hash(g.a)
+    pkok(id(g.a) in pkjson._canonical_memo, 'FrozenDict encoding not memoized')
+    pkeq(_expect('{"a":{"b":{"c":1}}}'), pkjson.canonical_hash(g))
+    pkeq(
+        [id(g)],
+        [k for k in (id(g), id(g.a), id(g.a.b)) if k in pkjson._canonical_memo],
+    )
+    pkeq(h, pkjson.canonical_hash(g.a))
+    a = array.array(str('d'), [1])
+    f = pkcollections.FrozenDict(a=a)
+    pkeq(_expect('{"a":[1]}'), pkjson.canonical_hash(f))
+    pkok(id(f) not in pkjson._canonical_memo, 'mutable value memoized')
+    a.append(2)
+    pkeq(_expect('{"a":[1,2]}'), pkjson.canonical_hash(f))
+    with pkexcept(ValueError):
+        pkjson.canonical_hash([float('nan')])
+    with pkexcept(TypeError):
+        pkjson.canonical_hash({1: 2})
+
+
+class _CountReads(object):
+
+    def __init__(self, f):
+        self.count = 0
+        self._f = f
+
+    def read(self, *args):
+        self.count += 1
+        return self._f.read(*args)
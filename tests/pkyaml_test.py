@@ -10,16 +10,120 @@ import sys
 
 import pytest
 import py
+import six
+import yaml
 
 from pykern import pkunit
 from pykern import pkyaml
 
+
+def test_dump():
+    """Dict and OrderedMapping round trip; files are replaced atomically"""
+    from pykern import pkcollections
+    from pykern.pkunit import pkeq, pkexcept
+    import os
+
+    v = pkcollections.Dict(
+        z=pkcollections.OrderedMapping([('y', 1), ('x', (2, u'\xe9'))]),
+        a=[pkcollections.freeze(dict(b=None)), 1.5],
+    )
+    s = pkyaml.dump_str(v)
+    pkeq(u'a:\n- b: null\n- 1.5\nz:\n  y: 1\n  x:\n  - 2\n  - \xe9\n', s)
+    pkeq(v.a, pkyaml.load_str(s).a)
+    pkeq({'1': 'a', 'b': 2}, pkyaml.load_str(pkyaml.dump_str(pkcollections.Dict({1: 'a', 'b': 2}))))
+    f = pkunit.empty_work_dir().join('d.yml')
+    f.write('old')
+    os.chmod(str(f), 0o640)
+    pkyaml.dump_file(f, v)
+    pkeq(v.z.x[1], pkyaml.load_file(f).z.x[1])
+    pkeq(0o640, os.stat(str(f)).st_mode & 0o777)
+    s = f.read()
+    with pkexcept(yaml.YAMLError):
+        pkyaml.dump_file(f, [object()])
+    pkeq(s, f.read())
+    pkeq(['d.yml'], os.listdir(str(f.dirpath())))
+
+
+def test_iter_documents():
+    """Documents are streamed in order, inline and in a pool"""
+    from pykern import pkcollections
+    from pykern.pkunit import pkeq
+
+    f = pkunit.empty_work_dir().join('m.yml')
+    f.write(''.join(
+        '--- # {}\na: {}\nb:\n  - c: "---"\n    d: |\n      ---\n'.format(i, i)
+        for i in range(200)
+    ) + '---\n[1, 2]\n')
+    expect = [
+        pkcollections.Dict(a=i, b=[pkcollections.Dict(c='---', d='---\n')])
+        for i in range(200)
+    ] + [[1, 2]]
+    pkeq(expect, list(pkyaml.iter_documents(f)))
+    v = list(pkyaml.iter_documents(f, processes=2, chunk_size=100))
+    pkeq(expect, v)
+    pkeq(pkcollections.Dict, type(v[-2].b[0]))
+    f.write(''.join(
+        '%YAML 1.1\n# c\n\n%TAG !x! tag:yaml.org,2002:\n--- !x!map\na: {}\n...\n'.format(i)
+        for i in range(50)
+    ))
+    expect = [pkcollections.Dict(a=i) for i in range(50)]
+    pkeq(expect, list(pkyaml.iter_documents(f)))
+    pkeq(expect, list(pkyaml.iter_documents(f, processes=2, chunk_size=100)))
+
+
 def test_load_file():
     """Test values are unicode"""
     y = pkyaml.load_file(pkunit.data_dir().join('conf1.yml'))
     _assert_unicode(y)
 
 
+def test_load_file_cache():
+    """Cache is validated by stat and returns copies unless frozen"""
+    from pykern import pkcollections
+    from pykern.pkunit import pkeq, pkok
+    import glob
+    import os
+    import pickle
+
+    d = pkunit.empty_work_dir()
+    f = d.join('c.yml')
+    f.write('a: [1, {b: 2}]\n')
+    v = pkyaml.load_file(f, cache=True, frozen=True)
+    pkeq(pkcollections.FrozenDict, type(v))
+    pkok(v is pkyaml.load_file(f, cache=True, frozen=True), 'cached value not shared')
+    m = pkyaml.load_file(f, cache=True)
+    pkeq(pkcollections.Dict, type(m.a[1]))
+    m.a[1].b = 3
+    pkeq(2, pkyaml.load_file(f, cache=True).a[1].b)
+    f.write('a: [1, {b: 22}]\n')
+    pkeq(22, pkyaml.load_file(f, cache=True).a[1].b)
+    r = d.join('r.yml')
+    r.write('a: &x\n  b: *x\n')
+    v = pkyaml.load_file(r, cache=True)
+    pkok(v.a.b is v.a, 'recursive anchor not preserved')
+    pkeq(0, len([k for k in pkyaml._cache if k.endswith('r.yml')]))
+    pkyaml.cfg.disk_cache = True
+    try:
+        pkyaml._cache.clear()
+        pkeq(22, pkyaml.load_file(f, cache=True).a[1].b)
+        p = glob.glob(str(d.join('.c.yml-*.pkyaml')))
+        pkeq(1, len(p))
+        # prove the pickle is used by another "process"
+        with open(p[0], 'wb') as x:
+            pickle.dump(pkcollections.Dict(a='from pickle'), x)
+        pkyaml._cache.clear()
+        pkeq('from pickle', pkyaml.load_file(f, cache=True).a)
+        os.chmod(p[0], 0o666)
+        pkyaml._cache.clear()
+        pkeq(22, pkyaml.load_file(f, cache=True).a[1].b)
+        pkeq(0, os.stat(p[0]).st_mode & 0o022)
+        f.write('a: 3\n')
+        pkeq(3, pkyaml.load_file(f, cache=True).a)
+        pkeq(1, len(glob.glob(str(d.join('.c.yml-*.pkyaml')))))
+    finally:
+        pkyaml.cfg.disk_cache = False
+
+
 def test_load_resource():
     """Test file can be read"""
     p1 = pkunit.import_module_from_data_dir('p1')
@@ -27,16 +131,39 @@ def test_load_resource():
         'Resource should be loaded relative to root package of caller'
 
 
+def test_load_str():
+    """Nested mappings are Dicts and keys are strings"""
+    from pykern import pkcollections
+    from pykern.pkunit import pkeq, pkexcept
+
+    y = pkyaml.load_str('''
+a: &a
+  b: [{c: 1}, x]
+  1: 2.5
+d:
+  <<: *a
+  e: null
+''')
+    pkeq(pkcollections.Dict, type(y))
+    pkeq(pkcollections.Dict, type(y.a.b[0]))
+    pkeq(1, y.a.b[0].c)
+    pkeq(2.5, y.d['1'])
+    pkeq(y.a.b, y.d.b)
+    pkeq(None, y.d.e)
+    _assert_unicode(y)
+    with pkexcept(yaml.YAMLError):
+        pkyaml.load_str('!!python/object:os.system {}')
+
+
 def _assert_unicode(value):
     if isinstance(value, dict):
         for k, v in value.items():
-            # TODO(robnagler) breaks with PY3
-            assert isinstance(k, unicode), \
+            assert isinstance(k, six.text_type), \
                 '{}: key is not unicode'.format(k)
             _assert_unicode(v)
     elif isinstance(value, list):
         for v in value:
             _assert_unicode(v)
     elif type(value) == str:
-        assert isinstance(value, unicode), \
+        assert isinstance(value, six.text_type), \
             '{}: value is not unicode'.format(value)